@@ -0,0 +1,60 @@
+"""Benchmark of application startup time.
+
+Every run is done in a fresh interpreter, so module import is measured too.
+Redis isn't required: connections are opened on first request only.
+
+Usage:
+    cd {PROJECT_ROOT_DIR}
+    python -m benchmarks.startup [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+RUN_CODE = """
+import time
+start = time.perf_counter()
+from rest.flask_server import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print(imported - start, created - imported)
+"""
+
+
+def measure_startup(runs=10):
+    """Measure import and application creation time.
+
+    :param runs: amount of runs
+    :return: list of (import time, create_app time) in seconds
+    """
+    results = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", RUN_CODE],
+                                         cwd=PROJECT_ROOT)
+        import_time, create_time = output.split()
+        results.append((float(import_time), float(create_time)))
+
+    return results
+
+
+def main():
+    """Print median startup time."""
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    results = measure_startup(runs)
+
+    import_time = statistics.median(result[0] for result in results)
+    create_time = statistics.median(result[1] for result in results)
+    print(f"Startup time (median of {runs} runs):\n"
+          f"    import rest.flask_server: {import_time * 1000:.1f} ms\n"
+          f"    create_app():             {create_time * 1000:.1f} ms\n"
+          f"    total:                    "
+          f"{(import_time + create_time) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,24 +5,35 @@ import yaml
 
 
 class Config:
-    """Class to load YAML files from 'configs' dir."""
+    """Class to load YAML files from 'configs' dir.
+
+    Files are parsed on first request of the config, not on import.
+    """
 
     configs_path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                                 '..', 'configs')
 
     configs = {}
+    config_files = None
+
+    @classmethod
+    def find_config_files(cls):
+        """Find YAML files in 'configs' dir.
 
-    for root, _, files in os.walk(configs_path):
-        for file_name in files:
-            if file_name.endswith('.yaml'):
-                file_path = os.path.join(root, file_name)
-                file_key = os.path.splitext(file_name)[0]
-                if file_key in configs:
-                    exception = f"Duplicate config name {file_key}!"
-                    raise KeyError(exception)
+        :return: dict {config name: file path}
+        """
+        config_files = {}
+        for root, _, files in os.walk(cls.configs_path):
+            for file_name in files:
+                if file_name.endswith('.yaml'):
+                    file_key = os.path.splitext(file_name)[0]
+                    if file_key in config_files:
+                        exception = f"Duplicate config name {file_key}!"
+                        raise KeyError(exception)
 
-                with open(file_path) as fconfig:
-                    configs[file_key] = yaml.full_load(fconfig)
+                    config_files[file_key] = os.path.join(root, file_name)
+
+        return config_files
 
     @classmethod
     def get(cls, config_name='server_data'):
@@ -31,4 +42,11 @@ class Config:
         :param config_name: config file name
         :return: dict with config data
         """
+        if config_name not in cls.configs:
+            if cls.config_files is None:
+                cls.config_files = cls.find_config_files()
+
+            with open(cls.config_files[config_name]) as fconfig:
+                cls.configs[config_name] = yaml.full_load(fconfig)
+
         return cls.configs[config_name]
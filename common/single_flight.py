@@ -0,0 +1,66 @@
+"""Module with SingleFlight class (coalescing of concurrent identical calls)."""
+
+import threading
+
+
+class _Call:
+    """In-flight call data shared between waiting threads."""
+
+    def __init__(self):
+        """__init__ obj."""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.interrupted = False
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one.
+
+    While a call for a key is in flight, other threads calling with the same
+    key wait for it and share its result (or exception). If the running call
+    is interrupted (i.e. by timeout), waiting threads retry it. Results are
+    not cached: the next call after completion runs the function again.
+    """
+
+    def __init__(self):
+        """__init__ obj."""
+        self.__calls = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """Run func once for all concurrent callers with the same key.
+
+        :param key: hashable identifier of the call
+        :param func: function to run
+        :return: func result
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.__calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.interrupted:
+                return self.do(key, func, *args, **kwargs)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as error:
+            call.error = error
+            raise
+        except BaseException:
+            # Interruption belongs to the running thread only
+            call.interrupted = True
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+        return call.result
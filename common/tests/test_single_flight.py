@@ -0,0 +1,126 @@
+"""Tests for SingleFlight."""
+
+import threading
+
+import pytest
+
+from common.single_flight import SingleFlight
+
+
+class Interrupted(BaseException):
+    """Interruption that isn't an Exception (like gevent Timeout)."""
+
+
+def run_concurrently(flight, func, callers=10):
+    """Call func via flight from several threads while the first one runs.
+
+    :return: list with results (or raised exceptions) of all callers
+    """
+    results = []
+    lock = threading.Lock()
+
+    def call():
+        try:
+            result = flight.do("key", func)
+        except BaseException as error:
+            result = error
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+class BlockingFunc:
+    """Function that waits until all callers are queued on the first call."""
+
+    def __init__(self, callers, outcomes):
+        """__init__ obj.
+
+        :param callers: amount of concurrent callers
+        :param outcomes: list of values to return or exceptions to raise
+        """
+        self.calls = 0
+        self.callers = callers
+        self.outcomes = list(outcomes)
+
+    def __call__(self, flight):
+        self.calls += 1
+        if self.calls == 1:
+            # Give other callers time to join the in-flight call
+            while flight.waiting < self.callers:
+                threading.Event().wait(0.001)
+            threading.Event().wait(0.05)
+        outcome = self.outcomes.pop(0) if self.outcomes else "late"
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+class CountingFlight(SingleFlight):
+    """SingleFlight that counts callers waiting for in-flight call."""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = 0
+        self.__lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        with self.__lock:
+            self.waiting += 1
+        return super().do(key, func, *args, **kwargs)
+
+
+@pytest.fixture
+def flight():
+    return CountingFlight()
+
+
+def test_concurrent_calls_share_result(flight):
+    func = BlockingFunc(10, ["value"])
+
+    results = run_concurrently(flight, lambda: func(flight))
+
+    assert func.calls == 1
+    assert results == ["value"] * 10
+
+
+def test_concurrent_calls_share_exception(flight):
+    error = ValueError("redis is down")
+    func = BlockingFunc(10, [error])
+
+    results = run_concurrently(flight, lambda: func(flight))
+
+    assert func.calls == 1
+    assert results == [error] * 10
+
+
+def test_interrupted_call_is_retried_by_waiting_callers(flight):
+    func = BlockingFunc(5, [Interrupted(), "value"])
+
+    results = run_concurrently(flight, lambda: func(flight), callers=5)
+
+    assert sum(isinstance(result, Interrupted) for result in results) == 1
+    assert None not in results
+    assert all(result in ("value", "late") for result in results
+               if not isinstance(result, Interrupted))
+
+
+def test_result_is_not_cached():
+    flight = SingleFlight()
+    values = iter([1, 2])
+
+    assert flight.do("key", lambda: next(values)) == 1
+    assert flight.do("key", lambda: next(values)) == 2
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    assert flight.do("a", lambda: "a") == "a"
+    assert flight.do("b", lambda: "b") == "b"
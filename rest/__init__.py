@@ -3,5 +3,7 @@
 Content:
     redis_storage   :package with Redis related modules
     __main__.py     :make package runnable
+    admission_control.py    :load shedding of incoming requests
     flask_server.py :flask server module, contains API calls handling
+    services.py     :lazily created per-process storage instances
 """
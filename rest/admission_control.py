@@ -0,0 +1,108 @@
+"""Module with admission control classes of incoming requests."""
+
+import math
+import threading
+import time
+
+
+class LoadShedder:
+    """Rejects requests when the worker is overloaded.
+
+    Worker is treated as overloaded when amount of in-flight requests or
+    observed Redis latency (exponentially weighted moving average) cross
+    the configured thresholds. While requests are shed the latency average
+    decays exponentially by time since the latest sample, so shedding lasts
+    for a time window that grows with Redis latency, regardless of amount
+    of incoming requests.
+    """
+
+    def __init__(self, max_in_flight, max_redis_latency_ms, smoothing=0.2,
+                 latency_decay_ms=1000):
+        """__init__ obj.
+
+        :param max_in_flight:   max amount of concurrently handled requests
+        :param max_redis_latency_ms: max average Redis call latency (ms)
+        :param smoothing:   weight of the latest latency sample in average
+        :param latency_decay_ms: time for latency average to decay e times
+                                 without samples (ms)
+        """
+        self.max_in_flight = max_in_flight
+        self.max_redis_latency = max_redis_latency_ms / 1000
+        self.smoothing = smoothing
+        self.latency_decay = latency_decay_ms / 1000
+
+        self.in_flight = 0
+        self.redis_latency = 0.0
+        self.__sampled_at = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """Try to admit a request.
+
+        :return: True if request is admitted, else False
+        """
+        with self.__lock:
+            if self.redis_latency > self.max_redis_latency:
+                # Shed requests don't produce latency samples, so let the
+                # average decay with time to admit traffic again once
+                # Redis recovers
+                now = time.monotonic()
+                self.redis_latency *= math.exp(
+                    (self.__sampled_at - now) / self.latency_decay)
+                self.__sampled_at = now
+                if self.redis_latency > self.max_redis_latency:
+                    return False
+
+            if self.in_flight >= self.max_in_flight:
+                return False
+
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        """Mark admitted request as finished."""
+        with self.__lock:
+            self.in_flight -= 1
+
+    def observe_redis_latency(self, latency):
+        """Add Redis call latency sample into the average.
+
+        :param latency: duration of Redis call (seconds)
+        """
+        with self.__lock:
+            delta = latency - self.redis_latency
+            self.redis_latency += self.smoothing * delta
+            self.__sampled_at = time.monotonic()
+
+
+class ConcurrencyLimit:
+    """Limits amount of concurrent long-running requests of the worker.
+
+    Used for requests that wait for changes and don't occupy LoadShedder
+    slot.
+    """
+
+    def __init__(self, max_concurrent):
+        """__init__ obj.
+
+        :param max_concurrent: max amount of concurrent requests
+        """
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.__lock = threading.Lock()
+
+    def acquire(self):
+        """Try to take a slot.
+
+        :return: True if slot is taken, else False
+        """
+        with self.__lock:
+            if self.active >= self.max_concurrent:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        """Free taken slot."""
+        with self.__lock:
+            self.active -= 1
@@ -1,34 +1,169 @@
 """Module with Flask functional. REST requests handling."""
 
-from flask import Flask, jsonify, request
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token
+import functools
+import hashlib
+import math
+import re
+import time
 
-from common.configs_handler import Config
-from rest.redis_storage.test_case_instance import TestCaseRedis
-from rest.redis_storage.test_suite_instance import TestSuiteRedis
+import click
+from flask import (Blueprint, Flask, Response, current_app, g, json, jsonify,
+                   request)
+from flask.cli import with_appcontext
+from flask_jwt_extended import (JWTManager, jwt_required, create_access_token,
+                                get_jwt_identity)
+from redis.exceptions import RedisError
+from werkzeug.local import LocalProxy
 
-server_data = Config().get()
+from rest.services import Services
+
+# Instances of current application, created lazily in every process
+services = LocalProxy(lambda: current_app.extensions['services'])
+
+server_data = LocalProxy(lambda: services.server_data)
 
 # Redis instances
-case_redis = TestCaseRedis(server_data['hash_names']['test_case'])
-suite_redis = TestSuiteRedis(server_data['hash_names']['test_suite'])
+stats_redis = LocalProxy(lambda: services.stats_redis)
+case_redis = LocalProxy(lambda: services.case_redis)
+suite_redis = LocalProxy(lambda: services.suite_redis)
+change_feed = LocalProxy(lambda: services.change_feed)
+
+# Admission control
+rate_limiter = LocalProxy(lambda: services.rate_limiter)
+load_shedder = LocalProxy(lambda: services.load_shedder)
+feed_subscribers = LocalProxy(lambda: services.feed_subscribers)
+
+# Idempotency-Key support for mutating requests
+idempotency_store = LocalProxy(lambda: services.idempotency_store)
+
+# Concurrent identical reads share one Redis fetch and response body
+read_flight = LocalProxy(lambda: services.read_flight)
 
 # Flask
-app = Flask(__name__)
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+jwt = JWTManager()
+
 
-app.config['JWT_SECRET_KEY'] = server_data['jwt_secrete_key']
-jwt = JWTManager(app)
+def get_client_id():
+    """Get identifier of the client: hash of access token or address.
+
+    :return: client id (str)
+    """
+    client = request.headers.get('Authorization') or request.remote_addr
+    return hashlib.sha1(str(client).encode("utf-8")).hexdigest()
 
-valid_user = server_data['valid_user']
 
+@api.before_app_request
+def admit_request():
+    """Shed load and apply rate limit before request handling.
 
-@app.route("/api/v1/")
+    :return: None if request is admitted, else 503 or 429 error response
+    """
+    if not load_shedder.acquire():
+        response = jsonify(message="Server is overloaded, try again later")
+        response.headers['Retry-After'] = str(
+            server_data['admission_control']['load_shedding']['retry_after'])
+        return response, 503
+    g.admitted = True
+
+    start = time.monotonic()
+    try:
+        # Bucket per access token (or client address) and route
+        allowed, retry_after = rate_limiter.take(
+            f"{get_client_id()}:{request.endpoint}")
+    except RedisError:
+        # Fail open: availability of API is not bound to the limiter
+        allowed = True
+    load_shedder.observe_redis_latency(time.monotonic() - start)
+
+    if not allowed:
+        response = jsonify(message="Too many requests")
+        response.headers['Retry-After'] = str(math.ceil(retry_after))
+        return response, 429
+
+    return None
+
+
+@api.teardown_app_request
+def release_request(_exception=None):
+    """Release admitted request slot."""
+    if g.pop('admitted', False):
+        load_shedder.release()
+
+
+def idempotent(func):
+    """Make route replay its first response for repeated Idempotency-Key.
+
+    Requests with the same key (per user, method and path) wait for the
+    first one to finish and get its stored response. Reservation of the key
+    is kept alive while the first request is handled. Failed (5xx)
+    responses are not stored, so the request could be retried.
+    Keys are scoped by JWT identity, not by access token, so retries with
+    refreshed token are replayed too (route has to require JWT).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        idempotency_key = request.headers.get("Idempotency-Key")
+
+        # Routes called from other routes belong to the outer request
+        if not idempotency_key or g.get('idempotent'):
+            return func(*args, **kwargs)
+        g.idempotent = True
+
+        key = hashlib.sha1(
+            f"{get_jwt_identity()}:{request.method}:{request.path}:"
+            f"{idempotency_key}".encode("utf-8")).hexdigest()
+        fingerprint = hashlib.sha1(request.get_data()).hexdigest()
+
+        idempotency_data = server_data['idempotency']
+        deadline = time.monotonic() + idempotency_data['wait_timeout']
+        while True:
+            owner, entry = idempotency_store.begin(key, fingerprint)
+            if owner is not None:
+                break
+
+            if entry['fingerprint'] != fingerprint:
+                return jsonify(message="Idempotency-Key is already used "
+                                       "with another request body"), 422
+
+            if entry['state'] == "done":
+                response = current_app.response_class(
+                    entry['body'], status=entry['status'],
+                    mimetype=entry['mimetype'])
+                response.headers['Idempotent-Replayed'] = "true"
+                return response
+
+            if time.monotonic() >= deadline:
+                return jsonify(message="Request with the same "
+                                       "Idempotency-Key is in progress"), 409
+            time.sleep(idempotency_data['poll_interval_ms'] / 1000)
+
+        try:
+            with idempotency_store.hold(key, owner):
+                response = current_app.make_response(func(*args, **kwargs))
+        except BaseException:
+            idempotency_store.release(key, owner)
+            raise
+
+        if response.status_code >= 500:
+            idempotency_store.release(key, owner)
+        else:
+            idempotency_store.save(key, owner, fingerprint,
+                                   response.status_code,
+                                   response.get_data(as_text=True),
+                                   response.mimetype)
+        return response
+
+    return wrapper
+
+
+@api.route("/")
 def index():
     """Server index."""
     return jsonify(message="Simple Test Management System API"), 200
 
 
-@app.route('/api/v1/login', methods=['POST'])
+@api.route('/login', methods=['POST'])
 def login():
     """Login to the server.
 
@@ -45,26 +180,73 @@ def login():
     if not (username and password):
         return jsonify(message="Bad request body"), 400
 
-    if username != valid_user['name'] or password != valid_user['password']:
+    if username != server_data['valid_user']['name'] or \
+            password != server_data['valid_user']['password']:
         return jsonify(message="No such username or password"), 401
 
     access_token = create_access_token(identity=username)
     return jsonify(access_token=access_token), 200
 
 
+def read_coalesced(key, field, read_func, *args):
+    """Read data once for all concurrent identical requests.
+
+    :param key: identifier of the read (i.e. ("test_case", <id>))
+    :param field: name of the response field with data
+    :param read_func: storage function that returns data or None
+    :return: serialized response body (str) or None if data doesn't exist
+    """
+    def read():
+        data = read_func(*args)
+        return None if data is None else json.dumps({field: data})
+
+    return read_flight.do(key, read)
+
+
+def get_query_ids():
+    """Get record ids from "ids" query parameter.
+
+    :return: list with unique ids in requested order, None if not set
+    """
+    if "ids" not in request.args:
+        return None
+
+    ids = request.args["ids"].split(",")
+    return list(dict.fromkeys(record_id for record_id in ids if record_id))
+
+
+def json_response(body):
+    """Create response object from serialized JSON body.
+
+    :param body: serialized JSON (str)
+    :return: Flask response object
+    """
+    return current_app.response_class(body, mimetype="application/json")
+
+
 # NOTE: Test case routes
-@app.route("/api/v1/test_cases", methods=['GET'])
+@api.route("/test_cases", methods=['GET'])
 @jwt_required
 def get_all_test_cases():
     """Get all test cases data.
 
+    Query parameters:
+        ids: comma separated ids of required test cases (optional)
     :return: {"test_cases": list with test cases data (dicts)}
     """
-    test_cases = case_redis.get_all()
-    return jsonify(test_cases=test_cases), 200
-
-
-@app.route("/api/v1/test_cases/<test_case_id>", methods=['GET'])
+    case_ids = get_query_ids()
+    if case_ids is None:
+        body = read_coalesced(("test_cases",), "test_cases",
+                              case_redis.get_all)
+    elif case_ids:
+        body = read_coalesced(("test_cases", tuple(case_ids)), "test_cases",
+                              case_redis.get_many, case_ids)
+    else:
+        return jsonify(message="Bad request query"), 400
+    return json_response(body), 200
+
+
+@api.route("/test_cases/<test_case_id>", methods=['GET'])
 @jwt_required
 def get_test_case(test_case_id):
     """Get test case data.
@@ -72,14 +254,16 @@ def get_test_case(test_case_id):
     :param test_case_id: id of test case
     :return: {"test_case": dict with test case data}
     """
-    test_case = case_redis.get(test_case_id)
-    if test_case is None:
+    body = read_coalesced(("test_case", test_case_id), "test_case",
+                          case_redis.get, test_case_id)
+    if body is None:
         return jsonify(message="Test case doesn't exist"), 404
-    return jsonify(test_case=test_case), 200
+    return json_response(body), 200
 
 
-@app.route("/api/v1/test_cases", methods=['POST'])
+@api.route("/test_cases", methods=['POST'])
 @jwt_required
+@idempotent
 def post_test_case():
     """Create new test case.
 
@@ -113,11 +297,15 @@ def post_test_case():
 
     suite_redis.update_cases(data['suite_id'], result, '+')
     suite_redis.update_length(data['suite_id'], "+")
+
+    change_feed.publish("test_case", "create", result)
+    change_feed.publish("test_suite", "update", data['suite_id'])
     return jsonify(message="Test case successfully added", id=result), 200
 
 
-@app.route("/api/v1/test_cases", methods=['DELETE'])
+@api.route("/test_cases", methods=['DELETE'])
 @jwt_required
+@idempotent
 def delete_all_test_cases():
     """All test cases deletion.
 
@@ -130,11 +318,16 @@ def delete_all_test_cases():
         suite_redis.update_length(case['suite_id'], "-")
 
     case_redis.delete_all()
+
+    change_feed.publish("test_case", "delete_all")
+    for suite_id in {case['suite_id'] for case in case_list}:
+        change_feed.publish("test_suite", "update", suite_id)
     return jsonify(message="All test cases successfully deleted"), 200
 
 
-@app.route("/api/v1/test_cases/<test_case_id>", methods=['PUT'])
+@api.route("/test_cases/<test_case_id>", methods=['PUT'])
 @jwt_required
+@idempotent
 def put_test_case(test_case_id):
     """Update existing test case data.
 
@@ -163,11 +356,13 @@ def put_test_case(test_case_id):
     if not case_redis.update(test_case_id, data):
         return jsonify(message="Test case does not exist"), 404
 
+    change_feed.publish("test_case", "update", test_case_id)
     return jsonify(message="Test case successfully updated"), 200
 
 
-@app.route("/api/v1/test_cases/<test_case_id>", methods=['DELETE'])
+@api.route("/test_cases/<test_case_id>", methods=['DELETE'])
 @jwt_required
+@idempotent
 def delete_test_case(test_case_id):
     """Test case deletion.
 
@@ -183,38 +378,53 @@ def delete_test_case(test_case_id):
 
     suite_redis.update_cases(suite_id, test_case_id, '-')
     suite_redis.update_length(suite_id, "-")
+
+    change_feed.publish("test_case", "delete", test_case_id)
+    change_feed.publish("test_suite", "update", suite_id)
     return jsonify(message="Test case successfully deleted"), 200
 
 
 # NOTE: Test Suite routes
-@app.route("/api/v1/test_suites", methods=['GET'])
+@api.route("/test_suites", methods=['GET'])
 @jwt_required
 def get_all_test_suites():
     """Get all test suites data.
 
+    Query parameters:
+        ids: comma separated ids of required test suites (optional)
     :return: {"test_suites": list with test suites data (dicts)}
     """
-    test_suites = suite_redis.get_all()
-    return jsonify(test_suites=test_suites), 200
-
-
-@app.route("/api/v1/test_suites/<test_suite_id>", methods=['GET'])
+    suite_ids = get_query_ids()
+    if suite_ids is None:
+        body = read_coalesced(("test_suites",), "test_suites",
+                              suite_redis.get_all)
+    elif suite_ids:
+        body = read_coalesced(("test_suites", tuple(suite_ids)),
+                              "test_suites", suite_redis.get_many, suite_ids)
+    else:
+        return jsonify(message="Bad request query"), 400
+    return json_response(body), 200
+
+
+@api.route("/test_suites/<test_suite_id>", methods=['GET'])
 @jwt_required
 def get_test_suite(test_suite_id):
     """Get test suite data.
 
     :return: {"test_suite": dict with test suite data}
     """
-    test_suite = suite_redis.get(test_suite_id)
+    body = read_coalesced(("test_suite", test_suite_id), "test_suite",
+                          suite_redis.get, test_suite_id)
 
-    if test_suite is None:
+    if body is None:
         return jsonify(message="Test suite doesn't exist"), 404
 
-    return jsonify(test_suite=test_suite), 200
+    return json_response(body), 200
 
 
-@app.route("/api/v1/test_suites", methods=['POST'])
+@api.route("/test_suites", methods=['POST'])
 @jwt_required
+@idempotent
 def post_test_suite():
     """Create test suite record.
 
@@ -239,11 +449,13 @@ def post_test_suite():
     if result is None:
         return jsonify(message="Test suite already exist"), 409
 
+    change_feed.publish("test_suite", "create", result)
     return jsonify(message="Test suite successfully added", id=result), 200
 
 
-@app.route("/api/v1/test_suites", methods=['DELETE'])
+@api.route("/test_suites", methods=['DELETE'])
 @jwt_required
+@idempotent
 def delete_all_test_suites():
     """Delete test suite.
 
@@ -257,6 +469,9 @@ def delete_all_test_suites():
         if request.json.get("force"):
             case_redis.delete_all()
             suite_redis.delete_all()
+
+            change_feed.publish("test_case", "delete_all")
+            change_feed.publish("test_suite", "delete_all")
             return jsonify(
                 message="All test cases and suites successfully deleted"), 200
 
@@ -264,12 +479,14 @@ def delete_all_test_suites():
     for suite in suite_list:
         if not suite['cases']:
             suite_redis.delete(suite['id'])
+            change_feed.publish("test_suite", "delete", suite['id'])
 
     return jsonify(message="Empty test suites successfully deleted"), 200
 
 
-@app.route("/api/v1/test_suites/<test_suite_id>", methods=['PUT'])
+@api.route("/test_suites/<test_suite_id>", methods=['PUT'])
 @jwt_required
+@idempotent
 def put_test_suite(test_suite_id):
     """Update existing test suite data.
 
@@ -293,11 +510,13 @@ def put_test_suite(test_suite_id):
     if not suite_redis.update(test_suite_id, data):
         return jsonify(message="Test suite does not exist"), 404
 
+    change_feed.publish("test_suite", "update", test_suite_id)
     return jsonify(message="Test suite successfully updated"), 200
 
 
-@app.route("/api/v1/test_suites/<test_suite_id>", methods=['DELETE'])
+@api.route("/test_suites/<test_suite_id>", methods=['DELETE'])
 @jwt_required
+@idempotent
 def delete_test_suite(test_suite_id):
     """Delete test suite.
 
@@ -328,11 +547,193 @@ def delete_test_suite(test_suite_id):
                     delete_test_case(case_id)
 
     suite_redis.delete(test_suite_id)
+
+    change_feed.publish("test_suite", "delete", test_suite_id)
     return jsonify(message="Test suite successfully deleted"), 200
 
 
+# NOTE: Change feed routes
+@api.route("/changes", methods=['GET'])
+@jwt_required
+def get_changes():
+    """Get changes of test cases and test suites.
+
+    Long-poll by default: waits for changes after "last_id" query parameter
+    (or "Last-Event-ID" header), only new changes are returned if not set.
+    With "Accept: text/event-stream" header changes are streamed as
+    Server-Sent Events until "max_stream_ms" passes, then client has to
+    reconnect with "Last-Event-ID" header. Amount of concurrent subscribers
+    per worker is limited with "max_subscribers".
+    :return: {"changes": list with changes data (dicts), "last_id": <str>,
+              "reset": <bool>} or SSE stream. "reset" is True if some
+              changes were dropped from the feed and data has to be
+              re-fetched in full
+    """
+    last_id = request.args.get("last_id",
+                               request.headers.get("Last-Event-ID"))
+    if last_id is not None and not re.fullmatch(r"\d+(-\d+)?", last_id):
+        return jsonify(message="Bad request query"), 400
+
+    feed_data = server_data['change_feed']
+    if not feed_subscribers.acquire():
+        response = jsonify(
+            message="Too many change feed subscribers, try again later")
+        response.headers['Retry-After'] = str(feed_data['retry_after'])
+        return response, 503
+
+    # Waiting for changes occupies subscriber slot instead of request slot
+    release_request()
+
+    # Stream outlives application context of the request
+    subscribers = feed_subscribers._get_current_object()
+    try:
+        reset = last_id is not None and change_feed.is_trimmed(last_id)
+        block_ms = feed_data['block_ms']
+        count = feed_data['batch_size']
+
+        if request.accept_mimetypes.best == "text/event-stream":
+            feed = change_feed._get_current_object()
+            deadline = time.monotonic() + feed_data['max_stream_ms'] / 1000
+
+            def stream(last_id):
+                if reset:
+                    yield "event: reset\ndata: {}\n\n"
+                while True:
+                    remaining_ms = int((deadline - time.monotonic()) * 1000)
+                    if remaining_ms <= 0:
+                        return
+                    changes, last_id = feed.read(
+                        last_id, count, min(block_ms, remaining_ms))
+                    if not changes:
+                        yield ": keep-alive\n\n"
+                    for change in changes:
+                        yield (f"id: {change['id']}\nevent: change\n"
+                               f"data: {json.dumps(change)}\n\n")
+
+            response = Response(stream(last_id),
+                                mimetype="text/event-stream",
+                                headers={"Cache-Control": "no-cache"})
+            # Slot is freed when server closes the stream
+            response.call_on_close(subscribers.release)
+            subscribers = None
+            return response
+
+        changes, last_id = change_feed.read(last_id, count, block_ms)
+        return jsonify(changes=changes, last_id=last_id, reset=reset), 200
+    finally:
+        if subscribers is not None:
+            subscribers.release()
+
+
+# NOTE: Stats routes
+@api.route("/stats", methods=['GET'])
+@jwt_required
+def get_stats():
+    """Get aggregate stats of test cases and test suites.
+
+    Query parameters:
+        top: amount of largest suites to return
+        suite_ids: comma separated ids of suites to return lengths for
+    :return: {"stats": dict with stats data}
+    """
+    top = request.args.get(
+        "top", server_data['requests']['query']['stats_top'], type=int)
+    if top < 1:
+        return jsonify(message="Bad request query"), 400
+
+    suite_ids = [suite_id for suite_id in
+                 request.args.get("suite_ids", "").split(",") if suite_id]
+
+    return jsonify(stats=stats_redis.get(top, suite_ids)), 200
+
+
+@click.command("rebuild-stats")
+@with_appcontext
+def rebuild_stats():
+    """Recompute aggregate stats from stored test cases and suites."""
+    suite_lengths = suite_redis.get_lengths()
+    cases_count = case_redis.count()
+    stats_redis.rebuild(cases_count, suite_lengths)
+    print(f"Stats rebuilt: {cases_count} test cases, "
+          f"{len(suite_lengths)} test suites")
+
+
+# NOTE: Admin routes
+def get_memory_usage():
+    """Get memory used by test cases and suites in Redis.
+
+    :return: dict {test_cases: <dict>, test_suites: <dict>, bytes: <int>}
+    """
+    usage = {"test_cases": case_redis.memory_usage(),
+             "test_suites": suite_redis.memory_usage()}
+    usage["bytes"] = usage["test_cases"]["bytes"] + \
+        usage["test_suites"]["bytes"]
+
+    return usage
+
+
+@api.route("/admin/memory", methods=['GET'])
+@jwt_required
+def get_memory():
+    """Get memory footprint of test cases and suites in Redis.
+
+    :return: {"memory": {"test_cases": dict with usage data,
+                         "test_suites": dict with usage data,
+                         "bytes": total amount of bytes}}
+    """
+    return jsonify(memory=get_memory_usage()), 200
+
+
+@click.command("memory-report")
+@with_appcontext
+def memory_report():
+    """Print memory footprint of test cases and suites in Redis."""
+    usage = get_memory_usage()
+    for name in ("test_cases", "test_suites"):
+        data = usage[name]
+        encodings = ", ".join(f"{encoding}: {amount}" for encoding, amount
+                              in sorted(data['encodings'].items()))
+        print(f"{name} ({data['layout']} layout): {data['records']} records, "
+              f"{data['bytes']} bytes, "
+              f"{data['bytes_per_record']:.1f} bytes per record, "
+              f"{data['keys']} keys ({encodings or 'no data'})")
+        if data.get('hashtable_buckets'):
+            print(f"  Warning: {data['hashtable_buckets']} buckets fell back "
+                  f"to hashtable encoding: records are longer than Redis "
+                  f"'hash-max-listpack-value' or bucket_size is above "
+                  f"'hash-max-listpack-entries'")
+    print(f"Total: {usage['bytes']} bytes")
+
+
+def create_app(config=None):
+    """Create Flask application.
+
+    Only 'server_data' config file is loaded here (if config isn't set).
+    Redis connections and storage instances are created on first use in
+    every (i.e. forked worker) process.
+    :param config: dict with server config, 'server_data' config file is
+                   used if None
+    :return: Flask application
+    """
+    app = Flask(__name__)
+    app.extensions['services'] = Services(config)
+
+    app.config['JWT_SECRET_KEY'] = \
+        app.extensions['services'].server_data['jwt_secrete_key']
+    jwt.init_app(app)
+
+    app.register_blueprint(api)
+    app.cli.add_command(rebuild_stats)
+    app.cli.add_command(memory_report)
+
+    return app
+
+
 def start_flask_server():
     """Start Flask server."""
-    app.run(host=server_data.get('host', 'localhost'),
-            port=server_data.get('port', 5000),
+    app = create_app()
+    config = app.extensions['services'].server_data
+
+    app.run(host=config.get('host', 'localhost'),
+            port=config.get('port', 5000),
             debug=True)
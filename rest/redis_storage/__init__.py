@@ -4,7 +4,13 @@ Note: Information about Redis could be found in README
 Content:
     abstract_instance.py    :module with abstract class for high level Redis
                             instances
+    bucketed_client.py      :Redis Client that splits items into small hashes
+    change_feed.py          :capped Redis Stream with data changes
+    idempotency.py          :stored responses of idempotent requests
+    rate_limiter.py         :Redis token bucket rate limiter
+    record_layout.py        :layouts of records stored in Redis
     redis_client.py         :contains class basic Redis commands
+    stats_instance.py       :incrementally maintained aggregate stats
     test_case_instance.py   :High level functional for work with Test cases
                             hash in Redis storage
     test_suite_instance.py  :High level functional for work with Test suites
@@ -39,6 +39,14 @@ class AbstractRedisInstance(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_many(self, record_ids):
+        """Get data of several records by ids.
+
+        :param record_ids: list of record ids
+        """
+        pass
+
     @abstractmethod
     def get_all(self):
         """Get data for all existing test cases."""
@@ -64,3 +72,8 @@ class AbstractRedisInstance(ABC):
         :param record_id: id of the record
         """
         pass
+
+    @abstractmethod
+    def count(self):
+        """Get amount of records in instance."""
+        pass
@@ -0,0 +1,205 @@
+"""Module with BucketedRedisClient class (items in small Redis hashes)."""
+
+from rest.redis_storage.redis_client import RedisClient
+
+
+class BucketedRedisClient(RedisClient):
+    """Redis Client handler that splits items into small hashes.
+
+    Item with id N is stored in hash "<hash_name>:<N // bucket_size>" under
+    field "<N % bucket_size>". Redis keeps bucket in memory-compact listpack
+    encoding only while bucket_size is below "hash-max-listpack-entries"
+    (128 by default) and every value is below "hash-max-listpack-value"
+    (64 bytes by default). A single longer value converts whole bucket into
+    hashtable encoding, memory_usage() reports such buckets.
+    Ids are calculated with "INCR" of "<hash_name>:next_id" key, so only
+    canonical non-negative integer ids are supported.
+    """
+
+    def __init__(self, hash_name, bucket_size=100, host='localhost',
+                 port=6379, connection=None):
+        """__init__ obj.
+
+        :param hash_name:   hash name of specific object (i.e."test_case_hash")
+        :param bucket_size: max amount of items in one hash
+        :param host:    database’s hostname or IP address
+        :param port:    database’s port
+        :param connection:  redis.Redis client to share (host and port are
+                            ignored then)
+        """
+        super().__init__(hash_name, host, port, connection)
+        self.bucket_size = bucket_size
+        self.counter_name = f"{hash_name}:next_id"
+
+    def __locate(self, key):
+        """Get bucket name and field of the item.
+
+        :param key: item id
+        :return: (bucket name, field) or (None, None) if id isn't a
+                 non-negative integer in canonical form (i.e. "01", " 1",
+                 "1_0", 1.5 and True are rejected, as ReprLayout doesn't
+                 find them either)
+        """
+        if isinstance(key, bool) or not isinstance(key, (int, str)):
+            return None, None
+
+        key = str(key)
+        if not (key.isascii() and key.isdigit()) or str(int(key)) != key:
+            return None, None
+
+        bucket, field = divmod(int(key), self.bucket_size)
+        return f"{self.name}:{bucket}", str(field)
+
+    def bucket_names(self):
+        """Get names of all buckets that could contain items.
+
+        :return: list with bucket names
+        """
+        max_id = int(self.redis.get(self.counter_name) or 0)
+        return [f"{self.name}:{bucket}"
+                for bucket in range(max_id // self.bucket_size + 1)]
+
+    def set_item(self, key, value):
+        """Add item to redis_storage database with "HSETNX" command.
+
+        :return: True if set successfully, else False
+        """
+        bucket, field = self.__locate(key)
+        return bucket is not None and \
+            bool(self.redis.hsetnx(bucket, field, value))
+
+    def update_item(self, key, value):
+        """Update existing item in redis_storage database with "HSET" command.
+
+        :return: True if updated successfully, else False
+        """
+        if self.is_item_exists(key):
+            bucket, field = self.__locate(key)
+            self.redis.hset(bucket, field, value)
+            return True
+        return False
+
+    def get_item(self, key):
+        """Get item from redis_storage database with "HGET" command.
+
+        :return: field value if exists, else "Nil"
+        """
+        bucket, field = self.__locate(key)
+        # Decode bytes into string
+        return self.redis.hget(bucket, field).decode("utf-8")
+
+    def get_items(self, keys):
+        """Get several items with "HMGET" command per bucket (one round trip).
+
+        :param keys: list of fields
+        :return: list with field values (None if field doesn't exist)
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            bucket, field = self.__locate(key)
+            if bucket is not None:
+                pipe.hget(bucket, field)
+        values = iter(pipe.execute())
+
+        # Decode bytes into string
+        items = []
+        for key in keys:
+            value = next(values) if self.__locate(key)[0] else None
+            items.append(value.decode("utf-8") if value is not None else None)
+        return items
+
+    def get_all_items(self):
+        """Get all items with "HGETALL" command per bucket (one round trip).
+
+        :return: dict with fields and their values if exists, else {}
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        bucket_names = self.bucket_names()
+        for bucket in bucket_names:
+            pipe.hgetall(bucket)
+
+        items = {}
+        for bucket, values in enumerate(pipe.execute()):
+            for field, value in values.items():
+                key = str(bucket * self.bucket_size + int(field))
+                # Decode bytes into string
+                items[key] = value.decode("utf-8")
+        return items
+
+    def get_all_keys(self):
+        """Get ids of all items with "HKEYS" command per bucket.
+
+        :return: list with ids
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for bucket in self.bucket_names():
+            pipe.hkeys(bucket)
+
+        return [str(bucket * self.bucket_size + int(field))
+                for bucket, fields in enumerate(pipe.execute())
+                for field in fields]
+
+    def delete_item(self, key):
+        """Delete item from redis_storage database with "HDEL" command.
+
+        :return: True if removed successfully, else False
+        """
+        bucket, field = self.__locate(key)
+        return bucket is not None and bool(self.redis.hdel(bucket, field))
+
+    def delete_all_values(self):
+        """Delete all buckets and id counter with "DEL" command.
+
+        :return: True if removed successfully, else False
+        """
+        return bool(self.redis.delete(*self.keys()))
+
+    def hash_len(self):
+        """Get amount of items with "HLEN" command per bucket.
+
+        :return: length (int)
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for bucket in self.bucket_names():
+            pipe.hlen(bucket)
+        return sum(pipe.execute())
+
+    def is_item_exists(self, key):
+        """Verify item exists in redis_storage database with "HEXISTS" command.
+
+        :return: True if exists, else False
+        """
+        bucket, field = self.__locate(key)
+        return bucket is not None and bool(self.redis.hexists(bucket, field))
+
+    def memory_usage(self, keys=None):
+        """Get memory used by items with "MEMORY USAGE" command.
+
+        :param keys: names of Redis keys to check, keys() if None
+        :return: dict {bytes: <int>, keys: <int>,
+                       encodings: {<encoding>: amount of keys},
+                       hashtable_buckets: <int>}
+        """
+        key_usage = self.key_usage(keys)
+        usage = self.summarize_usage(key_usage)
+
+        bucket_names = set(self.bucket_names())
+        usage["hashtable_buckets"] = sum(
+            key in bucket_names and encoding == "hashtable"
+            for key, (_, encoding) in key_usage.items())
+
+        return usage
+
+    def next_id(self):
+        """Calculate id for a new item with "INCR" command.
+
+        :return: id (str)
+        """
+        return str(self.redis.incr(self.counter_name))
+
+    def keys(self):
+        """Get names of Redis keys used to store items.
+
+        :return: list with key names
+        """
+        return self.bucket_names() + [self.counter_name]
@@ -0,0 +1,106 @@
+"""Module with ChangeFeed class (Redis Stream of data changes)."""
+
+import redis
+
+# Stream id to read the feed from the beginning
+FIRST_ID = "0-0"
+
+
+def _parse_id(stream_id):
+    """Convert stream id ("<ms>-<seq>") into comparable tuple."""
+    ms, _, seq = stream_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class ChangeFeed:
+    """Capped Redis Stream with changes of test cases and test suites.
+
+    Stream entry schema:
+        "<stream id>": {entity:<str>, action:<str>, record_id:<str>}
+
+    Change data schema (used in responses):
+        {
+            id: stream id of the change (use it to resume reading)
+            entity: "test_case" or "test_suite"
+            action: "create", "update", "delete" or "delete_all"
+            record_id: id of changed record ("" for "delete_all")
+        }
+    """
+
+    def __init__(self, stream_name, max_len, host='localhost', port=6379,
+                 connection=None):
+        """__init__ obj.
+
+        :param stream_name: stream name (i.e. "change_feed_stream")
+        :param max_len: approximate amount of changes kept in stream
+        :param host:    database’s hostname or IP address
+        :param port:    database’s port
+        :param connection:  redis.Redis client to share (host and port are
+                            ignored then)
+        """
+        if connection is None:
+            connection = redis.Redis(host=host, port=port)
+        self.redis = connection
+        self.name = stream_name
+        self.max_len = max_len
+
+    def publish(self, entity, action, record_id=""):
+        """Append change to the feed with "XADD" command.
+
+        :param entity: "test_case" or "test_suite"
+        :param action: "create", "update", "delete" or "delete_all"
+        :param record_id: id of changed record
+        :return: stream id of the change
+        """
+        fields = {"entity": entity, "action": action,
+                  "record_id": str(record_id)}
+        change_id = self.redis.xadd(self.name, fields, maxlen=self.max_len,
+                                    approximate=True)
+        return change_id.decode("utf-8")
+
+    def last_id(self):
+        """Get id of the latest change.
+
+        :return: stream id (str), FIRST_ID if feed is empty
+        """
+        entries = self.redis.xrevrange(self.name, count=1)
+        return entries[0][0].decode("utf-8") if entries else FIRST_ID
+
+    def is_trimmed(self, last_id):
+        """Verify that changes after last_id could be dropped by capping.
+
+        :param last_id: id of the latest change known by client
+        :return: True if client has to re-fetch full data, else False
+        """
+        if last_id == FIRST_ID:
+            return False
+
+        entries = self.redis.xrange(self.name, count=1)
+        if not entries:
+            return False
+
+        return _parse_id(entries[0][0].decode("utf-8")) > _parse_id(last_id)
+
+    def read(self, last_id=None, count=100, block_ms=None):
+        """Read changes after last_id with "XREAD" command.
+
+        :param last_id: id of the latest change known by client,
+                        None to read only new changes
+        :param count: max amount of changes to return
+        :param block_ms: time to wait for changes (ms), None to not wait
+        :return: (list with changes data (see schema in class docstring),
+                  id to resume reading from)
+        """
+        if last_id is None:
+            last_id = self.last_id()
+
+        changes = []
+        for _, entries in self.redis.xread({self.name: last_id}, count=count,
+                                           block=block_ms) or []:
+            for change_id, fields in entries:
+                change = {key.decode("utf-8"): value.decode("utf-8")
+                          for key, value in fields.items()}
+                change['id'] = last_id = change_id.decode("utf-8")
+                changes.append(change)
+
+        return changes, last_id
@@ -0,0 +1,174 @@
+"""Module with IdempotencyStore class (responses of idempotent requests)."""
+
+import contextlib
+import threading
+import uuid
+
+import redis
+
+# Reserve entry if it doesn't exist.
+# KEYS[1] - entry key; ARGV - owner token, fingerprint, lock ttl (ms)
+# Returns nil if reserved, else existing entry (flat field/value list)
+BEGIN_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('HGETALL', KEYS[1])
+end
+redis.call('HSET', KEYS[1], 'state', 'pending', 'owner', ARGV[1],
+           'fingerprint', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return false
+"""
+
+# Prolong reservation if it's still owned.
+# KEYS[1] - entry key; ARGV - owner token, lock ttl (ms)
+REFRESH_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+"""
+
+# Replace owned reservation with response.
+# KEYS[1] - entry key;
+# ARGV - owner token, ttl (sec), fingerprint, status, body, mimetype
+SAVE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'state', 'done', 'fingerprint', ARGV[3],
+           'status', ARGV[4], 'body', ARGV[5], 'mimetype', ARGV[6])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# Remove owned reservation.
+# KEYS[1] - entry key; ARGV - owner token
+RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+return redis.call('DEL', KEYS[1])
+"""
+
+
+class IdempotencyStore:
+    """Storage of responses by idempotency key.
+
+    The first request with a key reserves it ("pending" entry with owner
+    token that expires after lock_ttl unless refreshed), its response is
+    stored for ttl ("done" entry). Only the owner of reservation could
+    refresh, save or release it.
+
+    Entry schema (Redis hash):
+        {
+            state: "pending" or "done"
+            owner: token of reserving request (pending only)
+            fingerprint: hash of request body
+            status: response status code (done only)
+            body: response body (done only)
+            mimetype: response mimetype (done only)
+        }
+    """
+
+    def __init__(self, ttl, lock_ttl, key_prefix='idempotency',
+                 host='localhost', port=6379, connection=None):
+        """__init__ obj.
+
+        :param ttl: time to keep stored responses (sec)
+        :param lock_ttl: time to keep reservation of unfinished request
+                         without refresh (sec)
+        :param key_prefix: prefix for entry keys in Redis
+        :param host:    database’s hostname or IP address
+        :param port:    database’s port
+        :param connection:  redis.Redis client to share (host and port are
+                            ignored then)
+        """
+        if connection is None:
+            connection = redis.Redis(host=host, port=port)
+        self.redis = connection
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.key_prefix = key_prefix
+        self.__lock_ttl_ms = int(lock_ttl * 1000)
+        self.__begin = self.redis.register_script(BEGIN_SCRIPT)
+        self.__refresh = self.redis.register_script(REFRESH_SCRIPT)
+        self.__save = self.redis.register_script(SAVE_SCRIPT)
+        self.__release = self.redis.register_script(RELEASE_SCRIPT)
+
+    def begin(self, key, fingerprint):
+        """Reserve key for request.
+
+        :param key: idempotency key
+        :param fingerprint: hash of request body
+        :return: (owner token, None) if key reserved,
+                 else (None, existing entry (dict))
+        """
+        owner = uuid.uuid4().hex
+        entry = self.__begin(keys=[f"{self.key_prefix}:{key}"],
+                             args=[owner, fingerprint, self.__lock_ttl_ms])
+        if entry is None:
+            return owner, None
+
+        entry = {field.decode("utf-8"): value.decode("utf-8")
+                 for field, value in zip(entry[::2], entry[1::2])}
+        if "status" in entry:
+            entry["status"] = int(entry["status"])
+        return None, entry
+
+    def refresh(self, key, owner):
+        """Prolong reservation for lock_ttl.
+
+        :param key: idempotency key
+        :param owner: owner token from begin()
+        :return: True if reservation is still owned, else False
+        """
+        return bool(self.__refresh(keys=[f"{self.key_prefix}:{key}"],
+                                   args=[owner, self.__lock_ttl_ms]))
+
+    @contextlib.contextmanager
+    def hold(self, key, owner):
+        """Keep reservation alive while the request is handled.
+
+        :param key: idempotency key
+        :param owner: owner token from begin()
+        """
+        stopped = threading.Event()
+
+        def keep_alive():
+            while not stopped.wait(self.lock_ttl / 3):
+                if not self.refresh(key, owner):
+                    return
+
+        thread = threading.Thread(target=keep_alive, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def save(self, key, owner, fingerprint, status, body, mimetype):
+        """Store response of reserved request.
+
+        :param key: idempotency key
+        :param owner: owner token from begin()
+        :param fingerprint: hash of request body
+        :param status: response status code
+        :param body: response body (str)
+        :param mimetype: response mimetype
+        :return: True if saved, False if reservation isn't owned anymore
+        """
+        return bool(self.__save(keys=[f"{self.key_prefix}:{key}"],
+                                args=[owner, self.ttl, fingerprint, status,
+                                      body, mimetype]))
+
+    def release(self, key, owner):
+        """Remove reservation of failed request.
+
+        :param key: idempotency key
+        :param owner: owner token from begin()
+        :return: True if removed, False if reservation isn't owned anymore
+        """
+        return bool(self.__release(keys=[f"{self.key_prefix}:{key}"],
+                                   args=[owner]))
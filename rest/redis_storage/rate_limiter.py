@@ -0,0 +1,75 @@
+"""Module with RateLimiter class (Redis token bucket)."""
+
+import time
+
+import redis
+
+# Token bucket refill and take in a single round trip.
+# KEYS[1] - bucket key; ARGV - capacity, refill rate (tokens/sec), now (sec)
+# Returns {allowed (1/0), milliseconds until next token is available}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+
+return {allowed, retry_ms}
+"""
+
+
+class RateLimiter:
+    """Redis token bucket rate limiter.
+
+    Every bucket is stored in its own small hash ({tokens, ts}) that expires
+    once the bucket would be full again, so idle clients cost nothing.
+    """
+
+    def __init__(self, capacity, refill_rate, key_prefix='rate_limit',
+                 host='localhost', port=6379, connection=None):
+        """__init__ obj.
+
+        :param capacity:    max amount of tokens in bucket (burst size)
+        :param refill_rate: amount of tokens added to bucket per second
+        :param key_prefix:  prefix for bucket keys in Redis
+        :param host:    database’s hostname or IP address
+        :param port:    database’s port
+        :param connection:  redis.Redis client to share (host and port are
+                            ignored then)
+        """
+        if connection is None:
+            connection = redis.Redis(host=host, port=port)
+        self.redis = connection
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.key_prefix = key_prefix
+        self.__take = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, bucket):
+        """Take a token from the bucket.
+
+        :param bucket: bucket name (i.e. "<token>:<route>")
+        :return: (allowed, retry_after) - True if token was taken, else False
+                 and amount of seconds until next token is available
+        """
+        allowed, retry_ms = self.__take(
+            keys=[f"{self.key_prefix}:{bucket}"],
+            args=[self.capacity, self.refill_rate, time.time()])
+
+        return bool(allowed), retry_ms / 1000
@@ -0,0 +1,109 @@
+"""Module with layouts of records stored in Redis."""
+
+import json
+
+from common.helpers import get_json_from_str
+from rest.redis_storage.bucketed_client import BucketedRedisClient
+from rest.redis_storage.redis_client import RedisClient
+
+
+class ReprLayout:
+    """Record is Python repr of dict with data, all records in one hash.
+
+    Record example: "{'title': 'name', 'length': 0, 'cases': []}"
+    """
+
+    name = "repr"
+    # List fields (i.e. linked cases of suite) are stored inside of record
+    inline_lists = True
+
+    @staticmethod
+    def client(hash_name, connection=None):
+        """Create client for records.
+
+        :param hash_name: hash name of specific object (i.e."test_case_hash")
+        :param connection: redis.Redis client to share (optional)
+        :return: RedisClient instance
+        """
+        return RedisClient(hash_name, connection=connection)
+
+    @staticmethod
+    def encode(data, _fields):
+        """Transform data into record.
+
+        :param data: dict with record data
+        :return: record (str)
+        """
+        return str(data)
+
+    @staticmethod
+    def decode(record, _fields):
+        """Transform record into dict.
+
+        :param record: record data that is stored in Redis
+        :return: dict with record data
+        """
+        return get_json_from_str(record)
+
+
+class CompactLayout:
+    """Record is JSON list of field values, records in small hashes.
+
+    Record example: '["name",0]'
+    List fields (i.e. linked cases of suite) grow without limit, so they are
+    stored out of records (in Redis sets) to keep records short.
+    See BucketedRedisClient for details of hashes.
+    """
+
+    name = "compact"
+    inline_lists = False
+
+    def __init__(self, bucket_size=100):
+        """:param bucket_size: max amount of records in one hash."""
+        self.bucket_size = bucket_size
+
+    def client(self, hash_name, connection=None):
+        """Create client for records.
+
+        :param hash_name: hash name of specific object (i.e."test_case_hash")
+        :param connection: redis.Redis client to share (optional)
+        :return: BucketedRedisClient instance
+        """
+        return BucketedRedisClient(hash_name, self.bucket_size,
+                                   connection=connection)
+
+    @staticmethod
+    def encode(data, fields):
+        """Transform data into record.
+
+        :param data: dict with record data
+        :param fields: names of stored fields in order
+        :return: record (str)
+        """
+        return json.dumps([data.get(field) for field in fields],
+                          separators=(",", ":"))
+
+    @staticmethod
+    def decode(record, fields):
+        """Transform record into dict.
+
+        :param record: record data that is stored in Redis
+        :param fields: names of stored fields in order
+        :return: dict with record data
+        """
+        return dict(zip(fields, json.loads(record)))
+
+
+def get_layout(name='repr', bucket_size=100):
+    """Get record layout by name.
+
+    :param name: "repr" or "compact"
+    :param bucket_size: max amount of records in one hash (compact only)
+    :return: layout instance
+    """
+    if name == ReprLayout.name:
+        return ReprLayout()
+    if name == CompactLayout.name:
+        return CompactLayout(bucket_size)
+
+    raise RuntimeError(f"Unsupported record layout: '{name}'")
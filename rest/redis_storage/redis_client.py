@@ -11,14 +11,19 @@ class RedisClient:
     More info about Redis could be found in README.
     """
 
-    def __init__(self, hash_name, host='localhost', port=6379):
+    def __init__(self, hash_name, host='localhost', port=6379,
+                 connection=None):
         """__init__ obj.
 
         :param hash_name:   hash name of specific object (i.e."test_case_hash")
         :param host:    database’s hostname or IP address
         :param port:    database’s port
+        :param connection:  redis.Redis client to share (host and port are
+                            ignored then)
         """
-        self.redis = redis.Redis(host=host, port=port)
+        if connection is None:
+            connection = redis.Redis(host=host, port=port)
+        self.redis = connection
         self.name = hash_name
 
     def set_item(self, key, value):
@@ -49,6 +54,16 @@ class RedisClient:
         # Decode bytes into string
         return self.redis.hget(self.name, key).decode("utf-8")
 
+    def get_items(self, keys):
+        """Get several items from redis_storage database with "HMGET" command.
+
+        :param keys: list of fields
+        :return: list with field values (None if field doesn't exist)
+        """
+        # Decode bytes into string
+        return [value.decode("utf-8") if value is not None else None
+                for value in self.redis.hmget(self.name, keys)]
+
     def get_all_items(self):
         """Get all items from redis_storage database with "HGETALL" command.
 
@@ -58,6 +73,14 @@ class RedisClient:
         return {key.decode("utf-8"): value.decode("utf-8") for key, value in
                 self.redis.hgetall(self.name).items()}
 
+    def get_all_keys(self):
+        """Get ids of all items with "HKEYS" command.
+
+        :return: list with ids
+        """
+        # Decode bytes into string
+        return [key.decode("utf-8") for key in self.redis.hkeys(self.name)]
+
     def delete_item(self, key):
         """Delete item from redis_storage database with "HDEL" command.
 
@@ -85,3 +108,67 @@ class RedisClient:
         :return: True if exists, else False
         """
         return bool(self.redis.hexists(self.name, key))
+
+    def next_id(self):
+        """Calculate id for a new item.
+
+        :return: id (str)
+        """
+        return str(self.hash_len() + 1)
+
+    def keys(self):
+        """Get names of Redis keys used to store items.
+
+        :return: list with key names
+        """
+        return [self.name]
+
+    def key_usage(self, keys=None):
+        """Get memory and encoding of keys with "MEMORY USAGE" command.
+
+        :param keys: names of Redis keys to check, keys() if None
+        :return: dict {key name: (bytes <int>, encoding <str>)} of existing
+                 keys
+        """
+        keys = self.keys() if keys is None else keys
+        pipe = self.redis.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key, samples=0)
+            pipe.object("encoding", key)
+        results = pipe.execute()
+
+        key_usage = {}
+        for key, size, encoding in zip(keys, results[::2], results[1::2]):
+            if size is None:
+                continue
+            encoding = encoding.decode("utf-8") \
+                if isinstance(encoding, bytes) else encoding
+            key_usage[key] = (size, encoding)
+
+        return key_usage
+
+    @staticmethod
+    def summarize_usage(key_usage):
+        """Sum up memory usage of keys.
+
+        :param key_usage: dict from key_usage()
+        :return: dict {bytes: <int>, keys: <int>,
+                       encodings: {<encoding>: amount of keys}}
+        """
+        usage = {"bytes": 0, "keys": 0, "encodings": {}}
+        for size, encoding in key_usage.values():
+            usage["bytes"] += size
+            usage["keys"] += 1
+            usage["encodings"][encoding] = \
+                usage["encodings"].get(encoding, 0) + 1
+
+        return usage
+
+    def memory_usage(self, keys=None):
+        """Get memory used by items with "MEMORY USAGE" command.
+
+        :param keys: names of Redis keys to check, keys() if None
+        :return: dict {bytes: <int>, keys: <int>,
+                       encodings: {<encoding>: amount of keys}}
+        """
+        return self.summarize_usage(self.key_usage(keys))
@@ -0,0 +1,133 @@
+"""Module with StatsRedis class."""
+
+import redis
+
+
+class StatsRedis:
+    """Aggregate stats of test cases and test suites stored in Redis.
+
+    Stats are updated incrementally by storage instances on every change,
+    so reading them doesn't depend on amount of stored data.
+
+    Stats hash schema:
+        {test_cases: <int>, test_suites: <int>}
+    Suite sizes sorted set schema:
+        member: suite id, score: amount of linked test cases
+
+    Stats data schema (used in responses):
+        {
+            test_cases: total amount of test cases
+            test_suites: total amount of test suites
+            largest_suites: list of {id, length} ordered by length
+        }
+    """
+
+    CASES_FIELD = "test_cases"
+    SUITES_FIELD = "test_suites"
+
+    def __init__(self, hash_name, sizes_name, host='localhost', port=6379,
+                 connection=None):
+        """__init__ obj.
+
+        :param hash_name: hash name for counters (i.e. "stats_hash")
+        :param sizes_name: sorted set name for suite sizes
+        :param host:    database’s hostname or IP address
+        :param port:    database’s port
+        :param connection:  redis.Redis client to share (host and port are
+                            ignored then)
+        """
+        if connection is None:
+            connection = redis.Redis(host=host, port=port)
+        self.redis = connection
+        self.name = hash_name
+        self.sizes_name = sizes_name
+
+    def case_added(self):
+        """Count added test case."""
+        self.redis.hincrby(self.name, self.CASES_FIELD, 1)
+
+    def case_deleted(self):
+        """Count deleted test case."""
+        self.redis.hincrby(self.name, self.CASES_FIELD, -1)
+
+    def cases_cleared(self):
+        """Reset test cases counter."""
+        self.redis.hset(self.name, self.CASES_FIELD, 0)
+
+    def suite_added(self, suite_id):
+        """Count added (empty) test suite.
+
+        :param suite_id: id of test suite
+        """
+        pipe = self.redis.pipeline()
+        pipe.hincrby(self.name, self.SUITES_FIELD, 1)
+        pipe.zadd(self.sizes_name, {suite_id: 0})
+        pipe.execute()
+
+    def suite_deleted(self, suite_id):
+        """Count deleted test suite.
+
+        :param suite_id: id of test suite
+        """
+        pipe = self.redis.pipeline()
+        pipe.hincrby(self.name, self.SUITES_FIELD, -1)
+        pipe.zrem(self.sizes_name, suite_id)
+        pipe.execute()
+
+    def suites_cleared(self):
+        """Reset test suites counter and sizes."""
+        pipe = self.redis.pipeline()
+        pipe.hset(self.name, self.SUITES_FIELD, 0)
+        pipe.delete(self.sizes_name)
+        pipe.execute()
+
+    def suite_resized(self, suite_id, delta):
+        """Update amount of test cases linked to test suite.
+
+        :param suite_id: id of test suite
+        :param delta: change of suite length (i.e. 1 or -1)
+        """
+        self.redis.zincrby(self.sizes_name, delta, suite_id)
+
+    def get(self, top=10, suite_ids=()):
+        """Get aggregate stats.
+
+        :param top: amount of largest suites to return
+        :param suite_ids: ids of suites to return lengths for
+        :return: dict with stats data (see schema in class docstring),
+                 with additional "suite_lengths" {id: length} if suite_ids set
+        """
+        pipe = self.redis.pipeline()
+        pipe.hmget(self.name, self.CASES_FIELD, self.SUITES_FIELD)
+        pipe.zrevrange(self.sizes_name, 0, top - 1, withscores=True)
+        for suite_id in suite_ids:
+            pipe.zscore(self.sizes_name, suite_id)
+        (cases, suites), largest, *lengths = pipe.execute()
+
+        stats = {
+            "test_cases": int(cases or 0),
+            "test_suites": int(suites or 0),
+            "largest_suites": [
+                {"id": suite_id.decode("utf-8"), "length": int(length)}
+                for suite_id, length in largest]
+        }
+        if suite_ids:
+            stats["suite_lengths"] = {
+                suite_id: None if length is None else int(length)
+                for suite_id, length in zip(suite_ids, lengths)}
+
+        return stats
+
+    def rebuild(self, cases_count, suite_lengths):
+        """Recompute stats from scratch.
+
+        :param cases_count: total amount of test cases
+        :param suite_lengths: dict {suite id: amount of linked test cases}
+        """
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self.name, self.sizes_name)
+        pipe.hset(self.name, self.CASES_FIELD, cases_count)
+        pipe.hset(self.name, self.SUITES_FIELD, len(suite_lengths))
+        if suite_lengths:
+            pipe.zadd(self.sizes_name, suite_lengths)
+        pipe.execute()
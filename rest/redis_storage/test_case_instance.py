@@ -1,8 +1,7 @@
 """Module with TestCaseRedis class."""
 
-from common.helpers import get_json_from_str
 from rest.redis_storage.abstract_instance import AbstractRedisInstance
-from rest.redis_storage.redis_client import RedisClient
+from rest.redis_storage.record_layout import ReprLayout
 
 
 class TestCaseRedis(AbstractRedisInstance):
@@ -20,9 +19,21 @@ class TestCaseRedis(AbstractRedisInstance):
         }
     """
 
-    def __init__(self, hash_name):
-        """:param hash_name: specific for test cases hash name."""
-        self.__redis = RedisClient(hash_name)
+    # Stored fields (order is used by compact layout)
+    FIELDS = ("suite_id", "title", "description")
+
+    def __init__(self, hash_name, stats=None, connection=None, layout=None):
+        """__init__ obj.
+
+        :param hash_name: specific for test cases hash name.
+        :param stats: StatsRedis instance to keep updated (optional)
+        :param connection: redis.Redis client to share (optional)
+        :param layout: record layout (see record_layout.py), ReprLayout if
+                       not set
+        """
+        self.__layout = layout or ReprLayout()
+        self.__redis = self.__layout.client(hash_name, connection)
+        self.__stats = stats
 
     def get_record_data(self, case_id):
         """Transform record data stored in Redis into dict.
@@ -30,10 +41,36 @@ class TestCaseRedis(AbstractRedisInstance):
         :param case_id: id of test case
         :return: dict with test case data (see schema in class docstring)
         """
-        suite_data = get_json_from_str(self.__redis.get_item(case_id))
-        suite_data['id'] = case_id
+        return self.__decode(case_id, self.__redis.get_item(case_id))
+
+    def __read(self, case_id):
+        """Get stored record as dict (without id).
+
+        :param case_id: id of test case
+        :return: dict with record data
+        """
+        record = self.__redis.get_item(case_id)
+        return self.__layout.decode(record, self.FIELDS)
 
-        return suite_data
+    def __encode(self, data):
+        """Transform data into record to store in Redis.
+
+        :param data: dict with test case data
+        :return: record (str)
+        """
+        return self.__layout.encode(data, self.FIELDS)
+
+    def __decode(self, case_id, record):
+        """Transform record stored in Redis into dict.
+
+        :param case_id: id of test case
+        :param record: record data that is stored in Redis
+        :return: dict with test case data (see schema in class docstring)
+        """
+        record_data = self.__layout.decode(record, self.FIELDS)
+        record_data['id'] = case_id
+
+        return record_data
 
     def add(self, data):
         """Add test case data into DB.
@@ -47,9 +84,12 @@ class TestCaseRedis(AbstractRedisInstance):
         :return: case_id if successful, else None
         """
         # Calculate id for test case data
-        case_id = str(self.__redis.hash_len() + 1)
+        case_id = self.__redis.next_id()
+
+        result = self.__redis.set_item(case_id, self.__encode(data))
 
-        result = self.__redis.set_item(case_id, str(data))
+        if result and self.__stats:
+            self.__stats.case_added()
 
         return case_id if result else None
 
@@ -65,7 +105,7 @@ class TestCaseRedis(AbstractRedisInstance):
                 }
         :return: True if successful, else False
         """
-        return self.__redis.update_item(case_id, str(data))
+        return self.__redis.update_item(case_id, self.__encode(data))
 
     def get(self, case_id):
         """Get test case data by id.
@@ -83,12 +123,19 @@ class TestCaseRedis(AbstractRedisInstance):
 
         :return: list with test cases data(see dicts schema in class docstring)
         """
-        payload = []
-        for case_id in self.__redis.get_all_items().items():
-            data = self.get_record_data(case_id)
-            payload.append(data)
+        return [self.__decode(case_id, record) for case_id, record in
+                self.__redis.get_all_items().items()]
 
-        return payload
+    def get_many(self, case_ids):
+        """Get data of several test cases by ids.
+
+        :param case_ids: list with test case ids
+        :return: list with existing test cases data (see dicts schema in class
+                 docstring) in order of ids
+        """
+        return [self.__decode(case_id, record) for case_id, record in
+                zip(case_ids, self.__redis.get_items(case_ids))
+                if record is not None]
 
     def delete(self, case_id):
         """Delete test case.
@@ -98,12 +145,16 @@ class TestCaseRedis(AbstractRedisInstance):
         """
         if self.__redis.is_item_exists(case_id) and \
                 self.__redis.delete_item(case_id):
+            if self.__stats:
+                self.__stats.case_deleted()
             return True
 
         return False
 
     def delete_all(self):
         """Delete all test cases."""
+        if self.__stats:
+            self.__stats.cases_cleared()
         return self.__redis.delete_all_values()
 
     def is_item_exists(self, case_id):
@@ -114,10 +165,33 @@ class TestCaseRedis(AbstractRedisInstance):
         """
         return self.__redis.is_item_exists(case_id)
 
+    def count(self):
+        """Get amount of test cases.
+
+        :return: amount of test cases (int)
+        """
+        return self.__redis.hash_len()
+
+    def memory_usage(self):
+        """Get memory used by test cases.
+
+        :return: dict {layout: <str>, records: <int>, keys: <int>,
+                       bytes: <int>, bytes_per_record: <float>,
+                       encodings: {<encoding>: amount of keys},
+                       hashtable_buckets: <int> (compact layout only)}
+        """
+        usage = self.__redis.memory_usage()
+        usage["layout"] = self.__layout.name
+        usage["records"] = self.count()
+        usage["bytes_per_record"] = \
+            usage["bytes"] / usage["records"] if usage["records"] else 0
+
+        return usage
+
     def get_suite_id(self, case_id):
         """Get suite id for specific test case.
 
         :return: suite id (int)
         """
-        case_data = get_json_from_str(self.__redis.get_item(case_id))
+        case_data = self.__read(case_id)
         return int(case_data['suite_id'])
@@ -1,8 +1,7 @@
 """Module with TestSuiteRedis class."""
 
-from common.helpers import get_json_from_str
 from rest.redis_storage.abstract_instance import AbstractRedisInstance
-from rest.redis_storage.redis_client import RedisClient
+from rest.redis_storage.record_layout import ReprLayout
 
 
 class TestSuiteRedis(AbstractRedisInstance):
@@ -10,6 +9,8 @@ class TestSuiteRedis(AbstractRedisInstance):
 
     Test suite record schema (inside of hash):
         'id': "{title:<str>,length:<int>,cases:<list>}"
+    Layouts without inline lists keep cases out of record, in Redis set
+    "<hash_name>:cases:<id>".
 
     Test suite data schema(used in responses):
         {
@@ -20,9 +21,27 @@ class TestSuiteRedis(AbstractRedisInstance):
         }
     """
 
-    def __init__(self, hash_name):
-        """:param hash_name: specific for test suites hash name"""
-        self.__redis = RedisClient(hash_name)
+    # Stored fields (order is used by compact layout)
+    FIELDS = ("title", "length", "cases")
+
+    def __init__(self, hash_name, stats=None, connection=None, layout=None):
+        """__init__ obj.
+
+        :param hash_name: specific for test suites hash name
+        :param stats: StatsRedis instance to keep updated (optional)
+        :param connection: redis.Redis client to share (optional)
+        :param layout: record layout (see record_layout.py), ReprLayout if
+                       not set
+        """
+        self.__layout = layout or ReprLayout()
+        self.__redis = self.__layout.client(hash_name, connection)
+        self.__stats = stats
+
+        if self.__layout.inline_lists:
+            self.__fields = self.FIELDS
+        else:
+            self.__fields = tuple(
+                field for field in self.FIELDS if field != "cases")
 
     def get_record_data(self, suite_id):
         """Transform record data stored in Redis into dict.
@@ -30,10 +49,86 @@ class TestSuiteRedis(AbstractRedisInstance):
         :param suite_id: id of test case
         :return: dict with test suite data (see schema in class docstring)
         """
-        suite_data = get_json_from_str(self.__redis.get_item(suite_id))
-        suite_data['id'] = suite_id
+        return self.__decode_all([suite_id],
+                                 [self.__redis.get_item(suite_id)])[0]
+
+    def __read(self, suite_id):
+        """Get stored record as dict (without id).
+
+        :param suite_id: id of test suite
+        :return: dict with record data
+        """
+        record = self.__redis.get_item(suite_id)
+        return self.__layout.decode(record, self.__fields)
+
+    def __encode(self, data):
+        """Transform data into record to store in Redis.
+
+        :param data: dict with test suite data
+        :return: record (str)
+        """
+        return self.__layout.encode(data, self.__fields)
+
+    def __decode(self, suite_id, record, cases=None):
+        """Transform record stored in Redis into dict.
+
+        :param suite_id: id of test suite
+        :param record: record data that is stored in Redis
+        :param cases: list of linked test cases (if stored out of record)
+        :return: dict with test suite data (see schema in class docstring)
+        """
+        record_data = self.__layout.decode(record, self.__fields)
+        if not self.__layout.inline_lists:
+            record_data['cases'] = cases
+        record_data['id'] = suite_id
+
+        return record_data
+
+    def __decode_all(self, suite_ids, records):
+        """Transform several records stored in Redis into dicts.
+
+        :param suite_ids: list with test suite ids
+        :param records: list with records of the suites
+        :return: list with suites data (see dicts schema in class docstring)
+        """
+        if self.__layout.inline_lists:
+            cases = [None] * len(suite_ids)
+        else:
+            cases = self.__get_cases(suite_ids)
+
+        return [self.__decode(suite_id, record, suite_cases) for
+                suite_id, record, suite_cases in
+                zip(suite_ids, records, cases)]
+
+    def __cases_key(self, suite_id):
+        """Get name of Redis set with linked test cases.
+
+        :param suite_id: id of test suite
+        :return: key name (str)
+        """
+        return f"{self.__redis.name}:cases:{suite_id}"
 
-        return suite_data
+    def __cases_keys(self):
+        """Get names of Redis sets with linked test cases of all suites.
+
+        :return: list with key names
+        """
+        return [self.__cases_key(suite_id)
+                for suite_id in self.__redis.get_all_keys()]
+
+    def __get_cases(self, suite_ids):
+        """Get linked test cases of several suites with "SMEMBERS" command.
+
+        :param suite_ids: list with test suite ids
+        :return: list with lists of test case ids (in order of suite ids)
+        """
+        pipe = self.__redis.redis.pipeline(transaction=False)
+        for suite_id in suite_ids:
+            pipe.smembers(self.__cases_key(suite_id))
+
+        # Decode bytes into string, keep order of linking (ids grow)
+        return [sorted((case_id.decode("utf-8") for case_id in cases),
+                       key=int) for cases in pipe.execute()]
 
     def add(self, data):
         """Add test suite to DB.
@@ -41,7 +136,7 @@ class TestSuiteRedis(AbstractRedisInstance):
         :param data: dict with test suite data, schema :{title:<string>}
         :return: suite_id if successful, else None
         """
-        suite_id = str(self.__redis.hash_len() + 1)
+        suite_id = self.__redis.next_id()
         suite_length = 0
 
         data = {
@@ -50,7 +145,10 @@ class TestSuiteRedis(AbstractRedisInstance):
             "cases": []
         }
 
-        result = self.__redis.set_item(suite_id, str(data))
+        result = self.__redis.set_item(suite_id, self.__encode(data))
+
+        if result and self.__stats:
+            self.__stats.suite_added(suite_id)
 
         return suite_id if result else None
 
@@ -62,12 +160,13 @@ class TestSuiteRedis(AbstractRedisInstance):
         :return: True if successful, else False
         """
         # Prepare data to be stored in DB
-        suite_dict = get_json_from_str(self.__redis.get_item(record_id))
+        suite_dict = self.__read(record_id)
 
         data['length'] = suite_dict['length']
-        data['cases'] = suite_dict['cases']
+        if self.__layout.inline_lists:
+            data['cases'] = suite_dict['cases']
 
-        return self.__redis.update_item(record_id, str(data))
+        return self.__redis.update_item(record_id, self.__encode(data))
 
     def get(self, suite_id):
         """Get test suite data from DB.
@@ -85,12 +184,21 @@ class TestSuiteRedis(AbstractRedisInstance):
 
         :return: list with suites data (see dicts schema in class docstring)
         """
-        payload = []
-        for suite_id in self.__redis.get_all_items().items():
-            suite_data = self.get_record_data(suite_id)
-            payload.append(suite_data)
+        items = self.__redis.get_all_items()
+        return self.__decode_all(list(items), list(items.values()))
 
-        return payload
+    def get_many(self, suite_ids):
+        """Get data of several test suites by ids.
+
+        :param suite_ids: list with test suite ids
+        :return: list with existing suites data (see dicts schema in class
+                 docstring) in order of ids
+        """
+        found = [(suite_id, record) for suite_id, record in
+                 zip(suite_ids, self.__redis.get_items(suite_ids))
+                 if record is not None]
+        return self.__decode_all([suite_id for suite_id, _ in found],
+                                 [record for _, record in found])
 
     def delete(self, suite_id):
         """Delete target test suite data.
@@ -100,11 +208,21 @@ class TestSuiteRedis(AbstractRedisInstance):
         """
         if self.__redis.is_item_exists(suite_id) and self.__redis.delete_item(
                 suite_id):
+            if not self.__layout.inline_lists:
+                self.__redis.redis.delete(self.__cases_key(suite_id))
+            if self.__stats:
+                self.__stats.suite_deleted(suite_id)
             return True
         return False
 
     def delete_all(self):
         """Delete all test suites."""
+        if self.__stats:
+            self.__stats.suites_cleared()
+        if not self.__layout.inline_lists:
+            cases_keys = self.__cases_keys()
+            if cases_keys:
+                self.__redis.redis.delete(*cases_keys)
         return self.__redis.delete_all_values()
 
     def is_item_exists(self, suite_id):
@@ -115,22 +233,62 @@ class TestSuiteRedis(AbstractRedisInstance):
         """
         return self.__redis.is_item_exists(suite_id)
 
+    def count(self):
+        """Get amount of test suites.
+
+        :return: amount of test suites (int)
+        """
+        return self.__redis.hash_len()
+
+    def get_lengths(self):
+        """Get amount of linked test cases of all test suites.
+
+        :return: dict {suite id: length (int)}
+        """
+        return {suite_id: int(self.__layout.decode(record, self.__fields)[
+            'length']) for suite_id, record in
+            self.__redis.get_all_items().items()}
+
+    def memory_usage(self):
+        """Get memory used by test suites.
+
+        :return: dict {layout: <str>, records: <int>, keys: <int>,
+                       bytes: <int>, bytes_per_record: <float>,
+                       encodings: {<encoding>: amount of keys},
+                       hashtable_buckets: <int> (compact layout only)}
+        """
+        if self.__layout.inline_lists:
+            usage = self.__redis.memory_usage()
+        else:
+            usage = self.__redis.memory_usage(
+                self.__redis.keys() + self.__cases_keys())
+        usage["layout"] = self.__layout.name
+        usage["records"] = self.count()
+        usage["bytes_per_record"] = \
+            usage["bytes"] / usage["records"] if usage["records"] else 0
+
+        return usage
+
     def update_length(self, suite_id, action="+"):
         """Update suite length.
 
         :param suite_id: suite id
         :param action: + = increment; - = decrement
         """
-        suite_data = get_json_from_str(self.__redis.get_item(suite_id))
+        suite_data = self.__read(suite_id)
 
         if action == "+":
-            suite_data["length"] = int(suite_data["length"]) + 1
+            delta = 1
         elif action == "-":
-            suite_data["length"] = int(suite_data["length"]) - 1
+            delta = -1
         else:
             raise RuntimeError(f"Unsupported action: '{action}'")
 
-        self.__redis.update_item(suite_id, str(suite_data))
+        suite_data["length"] = int(suite_data["length"]) + delta
+        self.__redis.update_item(suite_id, self.__encode(suite_data))
+
+        if self.__stats:
+            self.__stats.suite_resized(suite_id, delta)
 
     def update_cases(self, suite_id, case_id, action='+'):
         """Update test case set that are linked to test suite.
@@ -139,7 +297,16 @@ class TestSuiteRedis(AbstractRedisInstance):
         :param case_id: id of linked test case
         :param action: '+' - link test case, '-' unlink test case
         """
-        suite_data = get_json_from_str(self.__redis.get_item(suite_id))
+        if not self.__layout.inline_lists:
+            if action == "+":
+                self.__redis.redis.sadd(self.__cases_key(suite_id), case_id)
+            elif action == "-":
+                self.__redis.redis.srem(self.__cases_key(suite_id), case_id)
+            else:
+                raise RuntimeError(f"Unsupported action: '{action}'")
+            return
+
+        suite_data = self.__read(suite_id)
 
         if action == "+":
             suite_data["cases"].append(case_id)
@@ -148,4 +315,4 @@ class TestSuiteRedis(AbstractRedisInstance):
         else:
             raise RuntimeError(f"Unsupported action: '{action}'")
 
-        self.__redis.update_item(suite_id, str(suite_data))
+        self.__redis.update_item(suite_id, self.__encode(suite_data))
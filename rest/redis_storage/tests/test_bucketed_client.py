@@ -0,0 +1,185 @@
+"""Tests for BucketedRedisClient with compact record layout."""
+
+import fakeredis
+import pytest
+
+from rest.redis_storage.bucketed_client import BucketedRedisClient
+from rest.redis_storage.record_layout import CompactLayout
+from rest.redis_storage.test_case_instance import TestCaseRedis as CaseRedis
+from rest.redis_storage.test_suite_instance import TestSuiteRedis as SuiteRedis
+
+
+@pytest.fixture
+def connection():
+    return fakeredis.FakeStrictRedis()
+
+
+@pytest.fixture
+def client(connection):
+    return BucketedRedisClient("items", bucket_size=2, connection=connection)
+
+
+@pytest.fixture
+def layout():
+    return CompactLayout(bucket_size=2)
+
+
+@pytest.fixture
+def suites(connection, layout):
+    return SuiteRedis("suites", connection=connection, layout=layout)
+
+
+@pytest.fixture
+def cases(connection, layout):
+    return CaseRedis("cases", connection=connection, layout=layout)
+
+
+def add_items(client, amount):
+    for _ in range(amount):
+        client.set_item(client.next_id(), f"value {client.hash_len()}")
+
+
+def test_items_are_split_into_buckets(client, connection):
+    add_items(client, 5)
+
+    assert connection.hgetall("items:0") == {b"1": b"value 0"}
+    assert connection.hgetall("items:1") == {b"0": b"value 1",
+                                             b"1": b"value 2"}
+    assert connection.hgetall("items:2") == {b"0": b"value 3",
+                                             b"1": b"value 4"}
+    assert client.hash_len() == 5
+
+
+def test_get_all_items_rebuilds_ids(client):
+    add_items(client, 5)
+    client.delete_item("3")
+
+    assert client.get_all_items() == {"1": "value 0", "2": "value 1",
+                                      "4": "value 3", "5": "value 4"}
+
+
+def test_get_items_skips_missing_and_non_numeric_ids(client):
+    add_items(client, 3)
+
+    assert client.get_items(["3", "abc", "1", "7", "1.5"]) == \
+        ["value 2", None, "value 0", None, None]
+
+
+def test_non_numeric_ids_are_not_stored(client):
+    assert not client.set_item("abc", "value")
+    assert not client.is_item_exists("abc")
+    assert not client.update_item("abc", "value")
+    assert not client.delete_item("abc")
+
+
+@pytest.mark.parametrize("key", ["01", " 1", "1 ", "1_0", "+1", "-1",
+                                 "\u0661", "", 1.5, True, None, b"1"])
+def test_non_canonical_ids_are_rejected(client, key):
+    add_items(client, 10)
+
+    assert not client.is_item_exists(key)
+    assert client.get_items([key]) == [None]
+    assert not client.update_item(key, "value")
+    assert not client.delete_item(key)
+    assert not client.set_item(key, "value")
+    assert client.hash_len() == 10
+
+
+def test_int_ids_are_accepted(client):
+    add_items(client, 1)
+
+    assert client.is_item_exists(1)
+    assert client.get_items([1]) == ["value 0"]
+
+
+def test_delete_all_values_removes_buckets_and_counter(client, connection):
+    add_items(client, 3)
+
+    assert client.delete_all_values()
+    assert connection.keys("items*") == []
+
+
+def test_case_round_trip(cases, connection):
+    case_id = cases.add({"suite_id": "1", "title": "case",
+                         "description": "info"})
+
+    assert connection.hget("cases:0", case_id) == b'["1","case","info"]'
+    assert cases.get(case_id) == {"id": case_id, "suite_id": "1",
+                                  "title": "case", "description": "info"}
+    assert cases.get_suite_id(case_id) == 1
+
+
+def test_suite_cases_are_stored_out_of_record(suites, connection):
+    suite_id = suites.add({"title": "suite"})
+    for case_id in ("2", "10", "3"):
+        suites.update_cases(suite_id, case_id, "+")
+        suites.update_length(suite_id, "+")
+    suites.update_cases(suite_id, "3", "-")
+    suites.update_length(suite_id, "-")
+
+    assert connection.hget("suites:0", suite_id) == b'["suite",2]'
+    assert suites.get(suite_id) == {"id": suite_id, "title": "suite",
+                                    "length": 2, "cases": ["2", "10"]}
+
+
+def test_suite_update_keeps_cases(suites):
+    suite_id = suites.add({"title": "suite"})
+    suites.update_cases(suite_id, "1", "+")
+
+    suites.update(suite_id, {"title": "renamed"})
+
+    assert suites.get(suite_id)["cases"] == ["1"]
+    assert suites.get(suite_id)["title"] == "renamed"
+
+
+def test_suites_get_all_and_get_many(suites):
+    suite_ids = [suites.add({"title": f"suite {i}"}) for i in range(3)]
+    suites.update_cases(suite_ids[2], "5", "+")
+
+    assert [(suite["id"], suite["cases"]) for suite in suites.get_all()] == \
+        [(suite_ids[0], []), (suite_ids[1], []), (suite_ids[2], ["5"])]
+    assert [suite["id"] for suite in
+            suites.get_many([suite_ids[2], "abc", suite_ids[0]])] == \
+        [suite_ids[2], suite_ids[0]]
+
+
+def test_suite_delete_removes_cases(suites, connection):
+    first = suites.add({"title": "first"})
+    second = suites.add({"title": "second"})
+    suites.update_cases(first, "1", "+")
+    suites.update_cases(second, "2", "+")
+
+    assert suites.delete(first)
+    assert not connection.exists(f"suites:cases:{first}")
+
+    suites.delete_all()
+    assert connection.keys("suites*") == []
+
+
+def test_get_all_keys_rebuilds_ids(client):
+    add_items(client, 5)
+    client.delete_item("2")
+
+    assert client.get_all_keys() == ["1", "3", "4", "5"]
+
+
+def test_hashtable_buckets_are_counted_once(client, monkeypatch):
+    add_items(client, 3)
+    key_usage = {"items:0": (100, "listpack"), "items:1": (900, "hashtable"),
+                 "items:next_id": (50, "int"),
+                 "items:cases:1": (300, "hashtable")}
+    monkeypatch.setattr(client, "key_usage", lambda keys=None: key_usage)
+
+    assert client.memory_usage() == {
+        "bytes": 1350, "keys": 4, "hashtable_buckets": 1,
+        "encodings": {"listpack": 1, "hashtable": 2, "int": 1}}
+
+
+def test_suites_delete_all_removes_only_sets_of_suites(suites, connection):
+    suite_id = suites.add({"title": "suite"})
+    suites.update_cases(suite_id, "1", "+")
+    connection.sadd("suites:cases:unrelated", "1")
+
+    suites.delete_all()
+
+    assert connection.keys("suites*") == [b"suites:cases:unrelated"]
@@ -0,0 +1,70 @@
+"""Tests for ChangeFeed."""
+
+import fakeredis
+import pytest
+
+from rest.redis_storage.change_feed import FIRST_ID, ChangeFeed
+
+
+@pytest.fixture
+def feed():
+    return ChangeFeed("feed", max_len=100,
+                      connection=fakeredis.FakeStrictRedis())
+
+
+def test_publish_appends_change(feed):
+    change_id = feed.publish("test_case", "create", 1)
+
+    assert feed.last_id() == change_id
+    assert feed.read(FIRST_ID) == ([{"id": change_id, "entity": "test_case",
+                                     "action": "create", "record_id": "1"}],
+                                   change_id)
+
+
+def test_read_after_last_id(feed):
+    first = feed.publish("test_suite", "create", "1")
+    second = feed.publish("test_suite", "delete_all")
+
+    changes, last_id = feed.read(first)
+
+    assert changes == [{"id": second, "entity": "test_suite",
+                        "action": "delete_all", "record_id": ""}]
+    assert last_id == second
+
+
+def test_read_limits_amount_of_changes(feed):
+    ids = [feed.publish("test_case", "update", i) for i in range(3)]
+
+    changes, last_id = feed.read(FIRST_ID, count=2)
+
+    assert [change["id"] for change in changes] == ids[:2]
+    assert last_id == ids[1]
+
+
+def test_read_without_last_id_returns_only_new_changes(feed):
+    known = feed.publish("test_case", "create", "1")
+
+    assert feed.read() == ([], known)
+
+
+def test_read_of_empty_feed(feed):
+    assert feed.last_id() == FIRST_ID
+    assert feed.read() == ([], FIRST_ID)
+    assert feed.read("5-0") == ([], "5-0")
+
+
+def test_is_trimmed(feed):
+    first = feed.publish("test_case", "create", "1")
+    ms, seq = (int(part) for part in first.split("-"))
+
+    assert not feed.is_trimmed(FIRST_ID)
+    assert not feed.is_trimmed(first)
+    assert not feed.is_trimmed(f"{ms + 1}-0")
+    assert feed.is_trimmed(f"{ms - 1}-{seq}")
+    assert feed.is_trimmed(str(ms - 1))
+    assert not feed.is_trimmed(str(ms + 1))
+
+
+def test_empty_feed_is_not_trimmed(feed):
+    assert not feed.is_trimmed("1-0")
+    assert not feed.is_trimmed("1")
@@ -0,0 +1,97 @@
+"""Tests for IdempotencyStore."""
+
+import time
+
+import fakeredis
+import pytest
+
+from rest.redis_storage.idempotency import IdempotencyStore
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore(ttl=100, lock_ttl=3, key_prefix="test",
+                            connection=fakeredis.FakeStrictRedis())
+
+
+def test_first_request_reserves_key(store):
+    owner, entry = store.begin("key", "body-hash")
+
+    assert owner is not None
+    assert entry is None
+    assert 0 < store.redis.ttl("test:key") <= 3
+
+
+def test_concurrent_request_sees_pending_entry(store):
+    store.begin("key", "body-hash")
+
+    owner, entry = store.begin("key", "body-hash")
+
+    assert owner is None
+    assert entry["state"] == "pending"
+    assert entry["fingerprint"] == "body-hash"
+
+
+def test_saved_response_is_replayed(store):
+    owner, _ = store.begin("key", "body-hash")
+    assert store.save("key", owner, "body-hash", 200, '{"id":"1"}',
+                      "application/json")
+
+    owner, entry = store.begin("key", "body-hash")
+
+    assert owner is None
+    assert entry == {"state": "done", "fingerprint": "body-hash",
+                     "status": 200, "body": '{"id":"1"}',
+                     "mimetype": "application/json"}
+    assert 3 < store.redis.ttl("test:key") <= 100
+
+
+def test_fingerprint_of_other_body_is_returned(store):
+    owner, _ = store.begin("key", "body-hash")
+    store.save("key", owner, "body-hash", 200, "{}", "application/json")
+
+    _, entry = store.begin("key", "other-body-hash")
+
+    assert entry["fingerprint"] == "body-hash"
+
+
+def test_released_key_could_be_reserved_again(store):
+    owner, _ = store.begin("key", "body-hash")
+
+    assert store.release("key", owner)
+    assert store.begin("key", "body-hash")[0] is not None
+
+
+def test_expired_owner_cannot_save_or_release(store):
+    first, _ = store.begin("key", "body-hash")
+    # Reservation of the first request expired, retry reserved the key
+    store.redis.delete("test:key")
+    second, _ = store.begin("key", "body-hash")
+
+    assert not store.save("key", first, "body-hash", 200, "{}",
+                          "application/json")
+    assert not store.release("key", first)
+    assert not store.refresh("key", first)
+    assert store.redis.hget("test:key", "owner").decode() == second
+
+
+def test_refresh_prolongs_reservation(store):
+    owner, _ = store.begin("key", "body-hash")
+    store.redis.expire("test:key", 1)
+
+    assert store.refresh("key", owner)
+    assert store.redis.ttl("test:key") > 1
+
+
+def test_hold_keeps_reservation_alive():
+    store = IdempotencyStore(ttl=100, lock_ttl=0.3, key_prefix="test",
+                             connection=fakeredis.FakeStrictRedis())
+    owner, _ = store.begin("key", "body-hash")
+    store.redis.pexpire("test:key", 200)
+
+    with store.hold("key", owner):
+        time.sleep(0.5)
+        assert store.redis.exists("test:key")
+
+    assert store.save("key", owner, "body-hash", 200, "{}",
+                      "application/json")
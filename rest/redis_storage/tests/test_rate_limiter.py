@@ -0,0 +1,69 @@
+"""Tests for RateLimiter (Redis token bucket)."""
+
+import fakeredis
+import pytest
+
+from rest.redis_storage import rate_limiter
+from rest.redis_storage.rate_limiter import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controlled time for token refill."""
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def limiter(clock):
+    """Limiter with 3 tokens burst and 2 tokens per second refill."""
+    return RateLimiter(3, 2, "test_limit",
+                       connection=fakeredis.FakeStrictRedis())
+
+
+def test_burst_up_to_capacity(limiter):
+    assert [limiter.take("client")[0] for _ in range(4)] == \
+        [True, True, True, False]
+
+
+def test_retry_after_of_empty_bucket(limiter):
+    for _ in range(3):
+        limiter.take("client")
+
+    allowed, retry_after = limiter.take("client")
+
+    assert not allowed
+    assert retry_after == pytest.approx(0.5)
+
+
+def test_refill_over_time(limiter, clock):
+    for _ in range(3):
+        limiter.take("client")
+
+    clock[0] += 1
+    assert [limiter.take("client")[0] for _ in range(3)] == \
+        [True, True, False]
+
+
+def test_refill_is_capped_by_capacity(limiter, clock):
+    limiter.take("client")
+
+    clock[0] += 60
+    assert [limiter.take("client")[0] for _ in range(4)] == \
+        [True, True, True, False]
+
+
+def test_buckets_are_independent(limiter):
+    for _ in range(3):
+        limiter.take("client:route")
+
+    assert not limiter.take("client:route")[0]
+    assert limiter.take("client:other_route")[0]
+
+
+def test_bucket_expires_when_full_again(limiter):
+    limiter.take("client")
+
+    ttl = limiter.redis.pttl("test_limit:client")
+    assert 0 < ttl <= 1500
@@ -0,0 +1,76 @@
+"""Tests for test cases and suites stored with repr record layout."""
+
+import fakeredis
+import pytest
+
+from rest.redis_storage.test_case_instance import TestCaseRedis as CaseRedis
+from rest.redis_storage.test_suite_instance import TestSuiteRedis as SuiteRedis
+
+
+@pytest.fixture
+def connection():
+    return fakeredis.FakeStrictRedis()
+
+
+@pytest.fixture
+def cases(connection):
+    return CaseRedis("cases", connection=connection)
+
+
+@pytest.fixture
+def suites(connection):
+    return SuiteRedis("suites", connection=connection)
+
+
+@pytest.fixture
+def commands(connection, monkeypatch):
+    """Names of hash read commands sent to Redis."""
+    sent = []
+    for name in ("hget", "hmget", "hgetall"):
+        command = getattr(connection, name)
+        monkeypatch.setattr(
+            connection, name,
+            lambda *args, name=name, command=command, **kwargs:
+            sent.append(name) or command(*args, **kwargs))
+    return sent
+
+
+def add_cases(cases, amount):
+    return [cases.add({"suite_id": "1", "title": f"case {i}",
+                       "description": "info"}) for i in range(amount)]
+
+
+def test_cases_get_all(cases, commands):
+    case_ids = add_cases(cases, 3)
+
+    assert cases.get_all() == [
+        {"id": case_id, "suite_id": "1", "title": f"case {i}",
+         "description": "info"} for i, case_id in enumerate(case_ids)]
+    assert commands == ["hgetall"]
+
+
+def test_cases_get_many(cases, commands):
+    case_ids = add_cases(cases, 3)
+
+    found = cases.get_many([case_ids[2], "7", case_ids[0], "abc"])
+
+    assert [case["id"] for case in found] == [case_ids[2], case_ids[0]]
+    assert found[0]["title"] == "case 2"
+    assert commands == ["hmget"]
+
+
+def test_suites_get_all_and_get_many(suites, commands):
+    suite_ids = [suites.add({"title": f"suite {i}"}) for i in range(3)]
+    suites.update_cases(suite_ids[1], "5", "+")
+    del commands[:]
+
+    assert [(suite["id"], suite["cases"]) for suite in suites.get_all()] == \
+        [(suite_ids[0], []), (suite_ids[1], ["5"]), (suite_ids[2], [])]
+    assert [suite["id"] for suite in
+            suites.get_many([suite_ids[1], "9", suite_ids[0]])] == \
+        [suite_ids[1], suite_ids[0]]
+    assert commands == ["hgetall", "hmget"]
+
+
+def test_get_many_of_nothing(cases):
+    assert cases.get_many(["1", "2"]) == []
@@ -0,0 +1,79 @@
+"""Tests for StatsRedis kept up to date by storage instances."""
+
+import fakeredis
+import pytest
+
+from rest.redis_storage.stats_instance import StatsRedis
+from rest.redis_storage.test_case_instance import TestCaseRedis as CaseRedis
+from rest.redis_storage.test_suite_instance import TestSuiteRedis as SuiteRedis
+
+
+@pytest.fixture
+def connection():
+    return fakeredis.FakeStrictRedis()
+
+
+@pytest.fixture
+def stats(connection):
+    return StatsRedis("stats", "sizes", connection=connection)
+
+
+@pytest.fixture
+def suites(connection, stats):
+    return SuiteRedis("suites", stats, connection=connection)
+
+
+@pytest.fixture
+def cases(connection, stats):
+    return CaseRedis("cases", stats, connection=connection)
+
+
+def add_case(cases, suites, suite_id):
+    """Add test case linked to suite (like POST /test_cases route)."""
+    case_id = cases.add({"suite_id": suite_id, "title": "case",
+                         "description": "info"})
+    suites.update_cases(suite_id, case_id, "+")
+    suites.update_length(suite_id, "+")
+    return case_id
+
+
+def test_stats_follow_changes(cases, suites, stats):
+    first = suites.add({"title": "first"})
+    second = suites.add({"title": "second"})
+    add_case(cases, suites, first)
+    add_case(cases, suites, second)
+    case_id = add_case(cases, suites, second)
+
+    assert stats.get(top=1, suite_ids=[first, "404"]) == {
+        "test_cases": 3,
+        "test_suites": 2,
+        "largest_suites": [{"id": second, "length": 2}],
+        "suite_lengths": {first: 1, "404": None},
+    }
+
+    cases.delete(case_id)
+    suites.update_cases(second, case_id, "-")
+    suites.update_length(second, "-")
+    suites.delete(first)
+
+    assert stats.get() == {
+        "test_cases": 2,
+        "test_suites": 1,
+        "largest_suites": [{"id": second, "length": 1}],
+    }
+
+
+def test_rebuild_from_stored_data(cases, suites, stats, connection):
+    first = suites.add({"title": "first"})
+    second = suites.add({"title": "second"})
+    add_case(cases, suites, second)
+    connection.delete("stats", "sizes")
+
+    stats.rebuild(cases.count(), suites.get_lengths())
+
+    assert stats.get() == {
+        "test_cases": 1,
+        "test_suites": 2,
+        "largest_suites": [{"id": second, "length": 1},
+                           {"id": first, "length": 0}],
+    }
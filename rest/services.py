@@ -0,0 +1,160 @@
+"""Module with Services class (per-process application instances)."""
+
+import os
+import threading
+import weakref
+
+import redis
+
+from common.configs_handler import Config
+from common.single_flight import SingleFlight
+from rest.admission_control import ConcurrencyLimit, LoadShedder
+from rest.redis_storage.change_feed import ChangeFeed
+from rest.redis_storage.idempotency import IdempotencyStore
+from rest.redis_storage.rate_limiter import RateLimiter
+from rest.redis_storage.record_layout import get_layout
+from rest.redis_storage.stats_instance import StatsRedis
+from rest.redis_storage.test_case_instance import TestCaseRedis
+from rest.redis_storage.test_suite_instance import TestSuiteRedis
+
+
+class Services:
+    """Lazily created storage and admission control instances.
+
+    Every instance is created on first use and belongs to the process that
+    created it: after fork (i.e. in server workers) all instances, including
+    Redis connection pool, are created again, so sockets and locks are never
+    shared between processes.
+    """
+
+    def __init__(self, server_data=None):
+        """__init__ obj.
+
+        :param server_data: dict with server config, loaded from
+                            'server_data' config file on first use if None
+        """
+        self.__server_data = server_data
+        self.__instances = {}
+        self.__lock = threading.RLock()
+
+        # Drop instances (and lock) inherited from parent process right
+        # after fork, before any thread of the child could use them
+        reset = weakref.WeakMethod(self.__reset)
+
+        def reset_in_child():
+            method = reset()
+            if method is not None:
+                method()
+
+        os.register_at_fork(after_in_child=reset_in_child)
+
+    def __reset(self):
+        """Forget all instances and create new lock."""
+        self.__instances = {}
+        self.__lock = threading.RLock()
+
+    @property
+    def server_data(self):
+        """Server config (dict)."""
+        if self.__server_data is None:
+            self.__server_data = Config.get()
+        return self.__server_data
+
+    def __get(self, name, create):
+        """Get instance of current process, create it if doesn't exist.
+
+        :param name: name of the instance
+        :param create: function that creates the instance
+        :return: instance
+        """
+        instance = self.__instances.get(name)
+        if instance is None:
+            with self.__lock:
+                instance = self.__instances.get(name)
+                if instance is None:
+                    instance = self.__instances[name] = create()
+
+        return instance
+
+    @property
+    def redis(self):
+        """Redis client (with connection pool) shared by instances."""
+        redis_data = self.server_data['redis']
+        return self.__get("redis", lambda: redis.Redis(
+            host=redis_data['host'], port=redis_data['port']))
+
+    @property
+    def layout(self):
+        """Record layout of test cases and suites."""
+        storage_data = self.server_data['storage']
+        return self.__get("layout", lambda: get_layout(
+            storage_data['layout'], storage_data['bucket_size']))
+
+    @property
+    def stats_redis(self):
+        """StatsRedis instance."""
+        hash_names = self.server_data['hash_names']
+        return self.__get("stats_redis", lambda: StatsRedis(
+            hash_names['stats'], hash_names['suite_sizes'],
+            connection=self.redis))
+
+    @property
+    def case_redis(self):
+        """TestCaseRedis instance."""
+        hash_names = self.server_data['hash_names']
+        return self.__get("case_redis", lambda: TestCaseRedis(
+            hash_names['test_case'], self.stats_redis, connection=self.redis,
+            layout=self.layout))
+
+    @property
+    def suite_redis(self):
+        """TestSuiteRedis instance."""
+        hash_names = self.server_data['hash_names']
+        return self.__get("suite_redis", lambda: TestSuiteRedis(
+            hash_names['test_suite'], self.stats_redis,
+            connection=self.redis, layout=self.layout))
+
+    @property
+    def change_feed(self):
+        """ChangeFeed instance."""
+        feed_data = self.server_data['change_feed']
+        return self.__get("change_feed", lambda: ChangeFeed(
+            feed_data['stream'], feed_data['max_len'],
+            connection=self.redis))
+
+    @property
+    def rate_limiter(self):
+        """RateLimiter instance."""
+        limit_data = self.server_data['admission_control']['rate_limit']
+        return self.__get("rate_limiter", lambda: RateLimiter(
+            limit_data['capacity'], limit_data['refill_rate'],
+            limit_data['key_prefix'], connection=self.redis))
+
+    @property
+    def load_shedder(self):
+        """LoadShedder instance."""
+        shedding_data = self.server_data['admission_control']['load_shedding']
+        return self.__get("load_shedder", lambda: LoadShedder(
+            shedding_data['max_in_flight'],
+            shedding_data['max_redis_latency_ms'],
+            latency_decay_ms=shedding_data['latency_decay_ms']))
+
+    @property
+    def feed_subscribers(self):
+        """ConcurrencyLimit of change feed subscribers."""
+        feed_data = self.server_data['change_feed']
+        return self.__get("feed_subscribers", lambda: ConcurrencyLimit(
+            feed_data['max_subscribers']))
+
+    @property
+    def idempotency_store(self):
+        """IdempotencyStore instance."""
+        idempotency_data = self.server_data['idempotency']
+        return self.__get("idempotency_store", lambda: IdempotencyStore(
+            idempotency_data['ttl'], idempotency_data['lock_ttl'],
+            idempotency_data['key_prefix'], connection=self.redis))
+
+    @property
+    def read_flight(self):
+        """SingleFlight instance for coalescing of identical reads."""
+        return self.__get("read_flight", SingleFlight)
@@ -0,0 +1,47 @@
+"""Fixtures of Flask application backed by fakeredis."""
+
+import copy
+
+import fakeredis
+import pytest
+
+from common.configs_handler import Config
+from rest.flask_server import create_app
+
+
+@pytest.fixture
+def server_data():
+    return copy.deepcopy(Config.get())
+
+
+@pytest.fixture
+def redis_server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def app(server_data, redis_server, monkeypatch):
+    monkeypatch.setattr(
+        "rest.services.redis.Redis",
+        lambda **_kwargs: fakeredis.FakeRedis(server=redis_server))
+    app = create_app(server_data)
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def token(client, server_data):
+    user = server_data['valid_user']
+    response = client.post("/api/v1/login", json={
+        "username": user['name'], "password": user['password']})
+    return response.get_json()['access_token']
+
+
+@pytest.fixture
+def headers(token):
+    return {"Authorization": f"Bearer {token}"}
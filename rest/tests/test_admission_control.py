@@ -0,0 +1,104 @@
+"""Tests for admission control of incoming requests."""
+
+import math
+
+import pytest
+
+from rest import admission_control
+from rest.admission_control import ConcurrencyLimit, LoadShedder
+
+
+def test_in_flight_limit():
+    shedder = LoadShedder(max_in_flight=2, max_redis_latency_ms=50)
+
+    assert shedder.acquire()
+    assert shedder.acquire()
+    assert not shedder.acquire()
+    assert shedder.in_flight == 2
+
+
+def test_release_frees_slot():
+    shedder = LoadShedder(max_in_flight=1, max_redis_latency_ms=50)
+    shedder.acquire()
+
+    shedder.release()
+
+    assert shedder.in_flight == 0
+    assert shedder.acquire()
+
+
+def test_rejected_request_takes_no_slot():
+    shedder = LoadShedder(max_in_flight=1, max_redis_latency_ms=50)
+    shedder.acquire()
+    shedder.acquire()
+
+    shedder.release()
+
+    assert shedder.in_flight == 0
+
+
+def test_slow_redis_sheds_load():
+    shedder = LoadShedder(max_in_flight=10, max_redis_latency_ms=50,
+                          smoothing=0.5)
+
+    shedder.observe_redis_latency(0.2)
+
+    assert shedder.redis_latency == 0.1
+    assert not shedder.acquire()
+    assert shedder.in_flight == 0
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission_control.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_shedding_holds_for_time_window_under_burst(clock):
+    shedder = LoadShedder(max_in_flight=10, max_redis_latency_ms=50,
+                          smoothing=1, latency_decay_ms=1000)
+    # Redis at 2x of threshold: shed for ln(2) sec
+    shedder.observe_redis_latency(0.1)
+
+    burst = [shedder.acquire() for _ in range(100)]
+    clock[0] += 0.6
+    later_burst = [shedder.acquire() for _ in range(100)]
+    clock[0] += 0.1
+
+    assert not any(burst)
+    assert not any(later_burst)
+    assert shedder.acquire()
+    assert shedder.in_flight == 1
+
+
+def test_latency_average_decays_with_time(clock):
+    shedder = LoadShedder(max_in_flight=10, max_redis_latency_ms=50,
+                          smoothing=1, latency_decay_ms=100)
+    shedder.observe_redis_latency(0.2)
+
+    clock[0] += 0.1
+    assert not shedder.acquire()
+    assert shedder.redis_latency == pytest.approx(0.2 / math.e)
+
+    clock[0] += 0.1
+    assert shedder.acquire()
+
+
+def test_fast_redis_admits_requests():
+    shedder = LoadShedder(max_in_flight=10, max_redis_latency_ms=50)
+
+    for _ in range(20):
+        shedder.observe_redis_latency(0.001)
+
+    assert shedder.acquire()
+
+
+def test_concurrency_limit():
+    limit = ConcurrencyLimit(max_concurrent=2)
+
+    assert [limit.acquire() for _ in range(3)] == [True, True, False]
+
+    limit.release()
+    assert limit.acquire()
+    assert limit.active == 2
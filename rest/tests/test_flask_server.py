@@ -0,0 +1,282 @@
+"""Tests for REST routes."""
+
+import threading
+
+import fakeredis
+import pytest
+from flask import jsonify
+from flask_jwt_extended import jwt_required
+
+from rest.flask_server import idempotent
+from rest.redis_storage.change_feed import ChangeFeed
+from rest.redis_storage.test_suite_instance import TestSuiteRedis as SuiteRedis
+
+
+@pytest.fixture
+def compact_layout(server_data):
+    server_data['storage']['layout'] = "compact"
+
+
+def add_suite(client, headers, title="suite"):
+    response = client.post("/api/v1/test_suites", json={"title": title},
+                           headers=headers)
+    return response.get_json()['id']
+
+
+def add_case(client, headers, suite_id, title="case"):
+    response = client.post("/api/v1/test_cases", json={
+        "suite_id": suite_id, "title": title, "description": "info"},
+        headers=headers)
+    return response
+
+
+@pytest.mark.usefixtures("compact_layout")
+@pytest.mark.parametrize("record_id", ["01", "1_0", "+1"])
+def test_compact_layout_rejects_non_canonical_ids(client, headers,
+                                                  record_id):
+    suite_id = add_suite(client, headers)
+    case_id = add_case(client, headers, suite_id).get_json()['id']
+
+    assert add_case(client, headers, record_id).status_code == 404
+    assert client.get(f"/api/v1/test_suites/{record_id}",
+                      headers=headers).status_code == 404
+    assert client.delete(f"/api/v1/test_cases/0{case_id}",
+                         headers=headers).status_code == 404
+
+    suite = client.get(f"/api/v1/test_suites/{suite_id}",
+                       headers=headers).get_json()['test_suite']
+    assert suite['length'] == 1
+    assert suite['cases'] == [case_id]
+    stats = client.get("/api/v1/stats", headers=headers).get_json()['stats']
+    assert record_id not in str(stats)
+
+
+@pytest.fixture
+def feed_data(server_data, monkeypatch):
+    # Blocking XREAD of fakeredis doesn't return entries, read without wait
+    read = ChangeFeed.read
+    monkeypatch.setattr(
+        ChangeFeed, "read", lambda feed, last_id=None, count=100,
+        block_ms=None: read(feed, last_id, count))
+    server_data['change_feed']['block_ms'] = 10
+    server_data['change_feed']['max_stream_ms'] = 50
+    return server_data['change_feed']
+
+
+@pytest.mark.parametrize("last_id", ["abc", "1-", "-1", "1-2-3", "1.5"])
+def test_changes_reject_malformed_last_id(client, headers, feed_data,
+                                          last_id):
+    response = client.get("/api/v1/changes", headers=headers,
+                          query_string={"last_id": last_id})
+
+    assert response.status_code == 400
+
+
+def test_changes_long_poll(client, headers, feed_data):
+    last_id = client.get("/api/v1/changes",
+                         headers=headers).get_json()['last_id']
+    suite_id = add_suite(client, headers)
+
+    data = client.get("/api/v1/changes", headers=headers,
+                      query_string={"last_id": last_id}).get_json()
+
+    assert [(change['entity'], change['action'], change['record_id'])
+            for change in data['changes']] == \
+        [("test_suite", "create", suite_id)]
+    assert not data['reset']
+
+
+def test_changes_subscribers_are_limited(app, client, headers, feed_data):
+    feed_data['max_subscribers'] = 1
+    with app.app_context():
+        subscribers = app.extensions['services'].feed_subscribers
+    subscribers.acquire()
+
+    response = client.get("/api/v1/changes", headers=headers)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(feed_data['retry_after'])
+
+    subscribers.release()
+    assert client.get("/api/v1/changes", headers=headers).status_code == 200
+    assert subscribers.active == 0
+
+
+def test_changes_stream_ends_and_frees_slot(app, client, headers, feed_data):
+    suite_id = add_suite(client, headers)
+
+    response = client.get("/api/v1/changes", headers={
+        **headers, "Accept": "text/event-stream", "Last-Event-ID": "0-0"})
+    body = response.get_data(as_text=True)
+    response.close()
+
+    assert response.mimetype == "text/event-stream"
+    assert "event: change" in body
+    assert f'"record_id": "{suite_id}"' in body
+    with app.app_context():
+        assert app.extensions['services'].feed_subscribers.active == 0
+
+
+@pytest.mark.parametrize("route", ["test_cases", "test_suites"])
+@pytest.mark.parametrize("ids", ["", ",", ",,"])
+def test_query_without_ids_is_rejected(client, headers, route, ids):
+    response = client.get(f"/api/v1/{route}", headers=headers,
+                          query_string={"ids": ids})
+
+    assert response.status_code == 400
+
+
+def test_cases_by_ids(client, headers):
+    suite_id = add_suite(client, headers)
+    case_ids = [add_case(client, headers, suite_id, f"case {i}")
+                .get_json()['id'] for i in range(3)]
+
+    response = client.get("/api/v1/test_cases", headers=headers,
+                          query_string={"ids": f"{case_ids[2]},9,,"
+                                               f"{case_ids[0]},{case_ids[2]}"})
+
+    assert response.status_code == 200
+    assert [case['id'] for case in response.get_json()['test_cases']] == \
+        [case_ids[2], case_ids[0]]
+
+
+def test_suites_by_ids(client, headers):
+    suite_ids = [add_suite(client, headers, f"suite {i}") for i in range(2)]
+
+    response = client.get("/api/v1/test_suites", headers=headers,
+                          query_string={"ids": f"{suite_ids[1]},abc"})
+
+    assert response.status_code == 200
+    assert [suite['id'] for suite in response.get_json()['test_suites']] == \
+        [suite_ids[1]]
+
+
+def test_all_cases_without_ids(client, headers):
+    suite_id = add_suite(client, headers)
+    case_id = add_case(client, headers, suite_id).get_json()['id']
+
+    response = client.get("/api/v1/test_cases", headers=headers)
+
+    assert [case['id'] for case in response.get_json()['test_cases']] == \
+        [case_id]
+
+
+def post_suite(client, headers, key, title="suite"):
+    return client.post("/api/v1/test_suites", json={"title": title},
+                       headers={**headers, "Idempotency-Key": key})
+
+
+def idempotency_keys(redis_server):
+    return fakeredis.FakeRedis(server=redis_server).keys("idempotency:*")
+
+
+def test_idempotent_request_is_replayed(client, headers):
+    first = post_suite(client, headers, "key")
+    second = post_suite(client, headers, "key")
+
+    assert second.status_code == 200
+    assert second.get_json() == first.get_json()
+    assert second.headers['Idempotent-Replayed'] == "true"
+    assert 'Idempotent-Replayed' not in first.headers
+    assert len(client.get("/api/v1/test_suites",
+                          headers=headers).get_json()['test_suites']) == 1
+
+
+def test_idempotent_retry_with_refreshed_token_is_replayed(client, headers,
+                                                           server_data):
+    first = post_suite(client, headers, "key")
+    user = server_data['valid_user']
+    token = client.post("/api/v1/login", json={
+        "username": user['name'],
+        "password": user['password']}).get_json()['access_token']
+    assert f"Bearer {token}" != headers['Authorization']
+
+    second = post_suite(client, {"Authorization": f"Bearer {token}"}, "key")
+
+    assert second.headers['Idempotent-Replayed'] == "true"
+    assert second.get_json() == first.get_json()
+
+
+def test_idempotency_key_with_other_body(client, headers):
+    post_suite(client, headers, "key")
+
+    response = post_suite(client, headers, "key", title="other")
+
+    assert response.status_code == 422
+
+
+def test_idempotent_request_in_progress(app, headers, server_data,
+                                        monkeypatch):
+    server_data['idempotency']['wait_timeout'] = 0.1
+    started, finish = threading.Event(), threading.Event()
+    add = SuiteRedis.add
+
+    def slow_add(suites, data):
+        started.set()
+        finish.wait(5)
+        return add(suites, data)
+
+    monkeypatch.setattr(SuiteRedis, "add", slow_add)
+    responses = []
+    first = threading.Thread(target=lambda: responses.append(
+        post_suite(app.test_client(), headers, "key")))
+    first.start()
+    started.wait(5)
+
+    second = post_suite(app.test_client(), headers, "key")
+    finish.set()
+    first.join()
+
+    assert second.status_code == 409
+    assert responses[0].status_code == 200
+
+
+@pytest.fixture
+def flaky_route(app):
+    failures = ["exception", "error"]
+
+    @jwt_required
+    @idempotent
+    def flaky():
+        if failures:
+            failure = failures.pop(0)
+            if failure == "exception":
+                raise RuntimeError("handler failed")
+            return jsonify(message="Server error"), 500
+        return jsonify(message="Done"), 200
+
+    app.add_url_rule("/flaky", "flaky", flaky, methods=['POST'])
+    return "/flaky"
+
+
+def test_failed_idempotent_request_is_released(client, headers, flaky_route,
+                                               redis_server):
+    headers = {**headers, "Idempotency-Key": "key"}
+
+    with pytest.raises(RuntimeError):
+        client.post(flaky_route, headers=headers)
+    assert idempotency_keys(redis_server) == []
+
+    assert client.post(flaky_route, headers=headers).status_code == 500
+    assert idempotency_keys(redis_server) == []
+
+    response = client.post(flaky_route, headers=headers)
+    assert response.status_code == 200
+    assert 'Idempotent-Replayed' not in response.headers
+    assert len(idempotency_keys(redis_server)) == 1
+
+
+def test_nested_route_call_has_no_own_reservation(client, headers,
+                                                  redis_server):
+    suite_id = add_suite(client, headers)
+    for i in range(2):
+        add_case(client, headers, suite_id, f"case {i}")
+
+    response = client.delete(f"/api/v1/test_suites/{suite_id}",
+                             json={"force": True},
+                             headers={**headers, "Idempotency-Key": "key"})
+
+    assert response.status_code == 200
+    assert client.get("/api/v1/test_cases",
+                      headers=headers).get_json()['test_cases'] == []
+    assert len(idempotency_keys(redis_server)) == 1
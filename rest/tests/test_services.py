@@ -0,0 +1,26 @@
+"""Tests for Services."""
+
+import os
+
+import pytest
+
+from rest.services import Services
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_instances_are_recreated_after_fork():
+    services = Services({})
+    parent_instance = services.read_flight
+
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        same = services.read_flight is parent_instance
+        os.write(write_end, b"1" if same else b"0")
+        os._exit(0)
+
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 1) == b"0"
+    os.close(read_end)
+    assert services.read_flight is parent_instance